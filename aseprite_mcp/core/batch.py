@@ -0,0 +1,74 @@
+"""Queue for batching several sprite operations into one Aseprite run.
+
+While a batch is open for a file, the drawing and canvas tools append their
+Lua bodies here instead of spawning Aseprite. Flushing the batch runs all
+queued operations in a single transaction followed by a single save.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from .commands import AsepriteCommandError
+
+_batch_file: Path | None = None
+_pending_ops: list[tuple[str, str]] = []
+
+
+def _key(filename: str | Path) -> str:
+    return os.path.abspath(filename)
+
+
+def begin(file_path: str | Path) -> None:
+    """Open a batch for the given file.
+
+    Raises:
+        AsepriteCommandError: If a batch is already open
+    """
+    global _batch_file
+    if _batch_file is not None:
+        raise AsepriteCommandError(
+            f"Error: A batch is already open for {_batch_file}; flush it first"
+        )
+    _batch_file = Path(file_path)
+    _pending_ops.clear()
+
+
+def is_open(filename: str | Path) -> bool:
+    """Check whether a batch is currently open for the given file."""
+    return _batch_file is not None and _key(_batch_file) == _key(filename)
+
+
+def queue(description: str, body: str) -> int:
+    """Append an operation to the open batch.
+
+    Args:
+        description: Human-readable summary of the operation
+        body: Lua statements performing the operation
+
+    Returns:
+        Number of operations now pending
+    """
+    _pending_ops.append((description, body))
+    return len(_pending_ops)
+
+
+def pending() -> int:
+    """Number of operations queued in the open batch."""
+    return len(_pending_ops)
+
+
+def describe_last(description: str) -> None:
+    """Replace the description of the most recently queued operation."""
+    _, body = _pending_ops[-1]
+    _pending_ops[-1] = (description, body)
+
+
+def take() -> tuple[Path | None, list[tuple[str, str]]]:
+    """Close the open batch and return its file and queued operations."""
+    global _batch_file
+    file_path, ops = _batch_file, list(_pending_ops)
+    _batch_file = None
+    _pending_ops.clear()
+    return file_path, ops
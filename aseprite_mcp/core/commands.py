@@ -2,21 +2,91 @@
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import functools
+import itertools
 import logging
 import os
+import shutil
 import subprocess
 import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import dotenv
 
-# Load environment variables
-dotenv.load_dotenv()
+if TYPE_CHECKING:
+    from .daemon import AsepriteDaemon
 
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def load_env() -> None:
+    """Load environment variables from a .env file, once per process.
+
+    Deferred until a setting is first needed rather than done at import, so
+    merely importing the package doesn't search for and parse a .env file.
+    Variables already set in the environment take precedence.
+    """
+    dotenv.load_dotenv()
+
+
+# Scratch files for Lua scripts, created once per process and reused between
+# calls instead of creating and deleting a temporary file every time
+_scratch_dir: Path | None = None
+_free_slots: list[Path] = []
+_slot_ids = itertools.count()
+_slot_lock = threading.Lock()
+
+
+def _acquire_slot() -> Path:
+    global _scratch_dir
+    with _slot_lock:
+        if _free_slots:
+            return _free_slots.pop()
+        if _scratch_dir is None:
+            _scratch_dir = Path(tempfile.mkdtemp(prefix="aseprite-mcp-"))
+            atexit.register(shutil.rmtree, _scratch_dir, ignore_errors=True)
+        return _scratch_dir / f"{next(_slot_ids)}.lua"
+
+
+@contextmanager
+def _temp_script(script_content: str) -> Iterator[str]:
+    """Write a Lua script to a reusable scratch file for the duration of a call.
+
+    Each concurrent call holds its own slot, which is returned to the pool
+    afterwards and overwritten by the next script.
+
+    Raises:
+        AsepriteCommandError: If the script is empty
+    """
+    if not script_content.strip():
+        raise AsepriteCommandError("Script content cannot be empty")
+
+    script_path = _acquire_slot()
+    try:
+        script_path.write_text(script_content, encoding="utf-8")
+        yield str(script_path)
+    finally:
+        with _slot_lock:
+            _free_slots.append(script_path)
+
+
+@functools.lru_cache(maxsize=8)
+def _aseprite_path(configured: str) -> str:
+    # Cached per configured value so the setting is only processed and logged
+    # once, while changes to ASEPRITE_PATH still take effect. Resolving to an
+    # absolute path up front spares every spawn its own search of $PATH.
+    path = shutil.which(configured) or configured
+    logger.debug(f"Using Aseprite path: {path}")
+    return path
+
+
 class AsepriteCommandError(Exception):
     """Custom exception for Aseprite command errors."""
 
@@ -31,9 +101,8 @@ class AsepriteCommand:
     @staticmethod
     def get_aseprite_path() -> str:
         """Get the Aseprite executable path from environment or default."""
-        path = os.getenv("ASEPRITE_PATH", "aseprite")
-        logger.debug(f"Using Aseprite path: {path}")
-        return path
+        load_env()
+        return _aseprite_path(os.getenv("ASEPRITE_PATH", "aseprite"))
 
     @staticmethod
     def run_command(args: list[str], timeout: int = 30) -> tuple[bool, str]:
@@ -44,7 +113,8 @@ class AsepriteCommand:
             timeout: Command timeout in seconds
 
         Returns:
-            tuple: (success, output) where success is a boolean and output is the command output
+            tuple: (success, output) where success is a boolean and output is the
+            command output
 
         Raises:
             AsepriteCommandError: If the command fails or times out
@@ -53,21 +123,23 @@ class AsepriteCommand:
         logger.info(f"Executing command: {' '.join(cmd)}")
 
         try:
+            # Output is kept as bytes and only decoded once it is actually used
             result = subprocess.run(
                 cmd,
                 check=True,
                 capture_output=True,
-                text=True,
                 timeout=timeout,
-                encoding="utf-8",
             )
-            logger.debug(f"Command succeeded with output: {result.stdout}")
-            return True, result.stdout
+            output = result.stdout.decode("utf-8", errors="replace")
+            logger.debug(f"Command succeeded with output: {output}")
+            return True, output
 
         except subprocess.CalledProcessError as e:
-            error_msg = f"Command failed with return code {e.returncode}: {e.stderr}"
-            logger.error(error_msg)
-            return False, e.stderr
+            error_output = (e.stderr or b"").decode("utf-8", errors="replace")
+            logger.error(
+                f"Command failed with return code {e.returncode}: {error_output}"
+            )
+            return False, error_output
 
         except subprocess.TimeoutExpired as e:
             error_msg = f"Command timed out after {timeout} seconds"
@@ -84,6 +156,98 @@ class AsepriteCommand:
             logger.error(error_msg)
             raise AsepriteCommandError(error_msg, cmd) from e
 
+    @staticmethod
+    async def run_command_async(args: list[str], timeout: int = 30) -> tuple[bool, str]:
+        """Run an Aseprite command without blocking the event loop.
+
+        Args:
+            args: List of command arguments
+            timeout: Command timeout in seconds
+
+        Returns:
+            tuple: (success, output) where success is a boolean and output is the
+            command output
+
+        Raises:
+            AsepriteCommandError: If the command cannot be started or times out
+        """
+        cmd = [AsepriteCommand.get_aseprite_path()] + args
+        logger.info(f"Executing command: {' '.join(cmd)}")
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError as e:
+            error_msg = f"Aseprite executable not found: {cmd[0]}"
+            logger.error(error_msg)
+            raise AsepriteCommandError(error_msg, cmd) from e
+        except Exception as e:
+            error_msg = f"Unexpected error running command: {e}"
+            logger.error(error_msg)
+            raise AsepriteCommandError(error_msg, cmd) from e
+
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except TimeoutError as e:
+            proc.kill()
+            await proc.wait()
+            error_msg = f"Command timed out after {timeout} seconds"
+            logger.error(error_msg)
+            raise AsepriteCommandError(error_msg, cmd) from e
+
+        if proc.returncode != 0:
+            error_output = stderr.decode("utf-8", errors="replace")
+            logger.error(
+                f"Command failed with return code {proc.returncode}: {error_output}"
+            )
+            return False, error_output
+
+        output = stdout.decode("utf-8", errors="replace")
+        logger.debug(f"Command succeeded with output: {output}")
+        return True, output
+
+    @staticmethod
+    def _script_args(
+        script_path: str, filename: str | Path | None
+    ) -> tuple[list[str], Path | None]:
+        """Build the batch-mode arguments for running a script on an optional file."""
+        args = ["--batch"]
+
+        # Callers pass files already checked with validate_file_exists
+        file_path = None
+        if filename:
+            file_path = Path(filename)
+            args.append(str(file_path))
+            logger.debug(f"Opening file: {file_path}")
+
+        args.extend(["--script", script_path])
+        return args, file_path
+
+    @staticmethod
+    def _daemon_for(script_path: str, file_path: Path | None) -> AsepriteDaemon | None:
+        """Return the daemon to run a script with, if daemon mode is enabled."""
+        # Reuse a running Aseprite process when daemon mode is enabled
+        from .daemon import get_daemon
+
+        daemon = get_daemon(AsepriteCommand.get_aseprite_path())
+        # The request line is tab- and newline-separated
+        paths = f"{file_path or ''}{script_path}"
+        if daemon is not None and any(c in paths for c in "\t\n"):
+            return None
+        return daemon
+
+    @staticmethod
+    def uses_daemon() -> bool:
+        """Whether scripts run in a persistent Aseprite process.
+
+        Only then do sprites stay open between calls, which is what makes
+        unsaved (``autosave=False``) edits survive until the next save.
+        """
+        from .daemon import get_daemon
+
+        return get_daemon(AsepriteCommand.get_aseprite_path()) is not None
+
     @staticmethod
     def execute_lua_script(
         script_content: str,
@@ -94,7 +258,8 @@ class AsepriteCommand:
 
         Args:
             script_content: Lua script code to execute
-            filename: Optional filename to open before executing script
+            filename: Optional file to open before executing the script, already
+                checked with validate_file_exists
             timeout: Script execution timeout in seconds
 
         Returns:
@@ -103,55 +268,60 @@ class AsepriteCommand:
         Raises:
             AsepriteCommandError: If script execution fails
         """
-        if not script_content.strip():
-            raise AsepriteCommandError("Script content cannot be empty")
+        with _temp_script(script_content) as script_path:
+            args, file_path = AsepriteCommand._script_args(script_path, filename)
 
-        # Create a temporary file for the script
-        with tempfile.NamedTemporaryFile(
-            suffix=".lua", delete=False, mode="w", encoding="utf-8"
-        ) as tmp:
-            tmp.write(script_content)
-            script_path = tmp.name
+            daemon = AsepriteCommand._daemon_for(script_path, file_path)
+            if daemon is not None:
+                return daemon.run_script(script_path, file_path, timeout=timeout)
 
-        try:
-            args = ["--batch"]
+            success, output = AsepriteCommand.run_command(args, timeout=timeout)
+            return success, output
 
-            # Add filename if provided and exists
-            if filename:
-                file_path = Path(filename)
-                if file_path.exists():
-                    args.append(str(file_path))
-                    logger.debug(f"Opening file: {file_path}")
-                else:
-                    logger.warning(f"File not found: {file_path}")
+    @staticmethod
+    async def execute_lua_script_async(
+        script_content: str,
+        filename: str | Path | None = None,
+        timeout: int = 30,
+    ) -> tuple[bool, str]:
+        """Execute a Lua script in Aseprite without blocking the event loop.
 
-            args.extend(["--script", script_path])
+        Args:
+            script_content: Lua script code to execute
+            filename: Optional file to open before executing the script, already
+                checked with validate_file_exists
+            timeout: Script execution timeout in seconds
 
-            success, output = AsepriteCommand.run_command(args, timeout=timeout)
-            return success, output
+        Returns:
+            tuple: (success, output)
+
+        Raises:
+            AsepriteCommandError: If script execution fails
+        """
+        with _temp_script(script_content) as script_path:
+            args, file_path = AsepriteCommand._script_args(script_path, filename)
+
+            daemon = AsepriteCommand._daemon_for(script_path, file_path)
+            if daemon is not None:
+                return await asyncio.to_thread(
+                    daemon.run_script, script_path, file_path, timeout
+                )
 
-        finally:
-            # Clean up the temporary script file
-            try:
-                os.remove(script_path)
-                logger.debug(f"Cleaned up temporary script: {script_path}")
-            except OSError as e:
-                logger.warning(f"Failed to clean up temporary script {script_path}: {e}")
+            return await AsepriteCommand.run_command_async(args, timeout=timeout)
 
     @staticmethod
-    def validate_file_exists(filename: str | Path) -> Path:
-        """Validate that a file exists and return its Path object.
+    def validate_file_exists(filename: str | Path) -> str | Path:
+        """Validate that a file exists.
 
         Args:
             filename: Path to the file to validate
 
         Returns:
-            Path object of the validated file
+            The validated filename, unchanged
 
         Raises:
             AsepriteCommandError: If the file doesn't exist
         """
-        file_path = Path(filename)
-        if not file_path.exists():
-            raise AsepriteCommandError(f"File not found: {file_path}")
-        return file_path
\ No newline at end of file
+        if not os.path.exists(filename):
+            raise AsepriteCommandError(f"File not found: {filename}")
+        return filename
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""Persistent Aseprite process for running Lua scripts without respawning.
+
+Starting Aseprite takes one to three seconds, which dominates the cost of
+most tool calls. When ``ASEPRITE_DAEMON`` is enabled, a single Aseprite
+process is kept running a dispatcher script that reads requests from a FIFO,
+opens the requested sprite, runs the requested script with ``dofile`` and
+writes the captured output back through a second FIFO.
+
+Sprites opened for a request stay open for later requests, so operations run
+with ``autosave=False`` accumulate in memory until the sprite is saved. A
+sprite is reopened from disk if its file changed outside the daemon.
+
+Only available on platforms with ``os.mkfifo``; elsewhere scripts keep
+running in a fresh Aseprite process per call.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import re
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from .commands import AsepriteCommandError, load_env
+
+logger = logging.getLogger(__name__)
+
+DISPATCHER_SCRIPT = r"""
+local requests = io.open(app.params["requests"], "r")
+local responses = io.open(app.params["responses"], "w")
+
+local function escape(s)
+    return (s:gsub("\\", "\\\\"):gsub("\n", "\\n"))
+end
+
+-- Sprites kept open between requests, by the filename they were requested as
+local sprites = {}
+
+local function tracked(filename)
+    local spr = sprites[filename]
+    if spr and pcall(function() return spr.filename end) then
+        return spr
+    end
+    sprites[filename] = nil
+    return nil
+end
+
+for line in requests:lines() do
+    if line == "EXIT" then
+        break
+    end
+
+    local token, reload, filename, script =
+        line:match("^([^\t]*)\t([^\t]*)\t([^\t]*)\t(.*)$")
+    local out = {}
+    local original_print = print
+    print = function(...)
+        local parts = {}
+        for i = 1, select("#", ...) do
+            parts[#parts + 1] = tostring(select(i, ...))
+        end
+        out[#out + 1] = table.concat(parts, "\t")
+    end
+
+    local ok, err = pcall(function()
+        if filename ~= "" then
+            local spr = tracked(filename)
+            if spr and reload == "1" then
+                spr:close()
+                spr = nil
+            end
+            if not spr then
+                spr = app.open(filename)
+                sprites[filename] = spr
+            end
+            app.activeSprite = spr
+        end
+        dofile(script)
+    end)
+    print = original_print
+
+    -- Close sprites that scripts created or opened themselves
+    local keep = {}
+    for name in pairs(sprites) do
+        local spr = tracked(name)
+        if spr then
+            keep[spr.filename] = true
+        end
+    end
+    for i = #app.sprites, 1, -1 do
+        local spr = app.sprites[i]
+        if not keep[spr.filename] then
+            spr:close()
+        end
+    end
+
+    local status = "OK"
+    if not ok then
+        status = "ERR"
+        out[#out + 1] = tostring(err)
+    end
+    local payload = escape(table.concat(out, "\n"))
+    responses:write(token .. "\t" .. status .. "\t" .. payload .. "\n")
+    responses:flush()
+end
+
+requests:close()
+responses:close()
+"""
+
+
+def _mtime(filename: str) -> int | None:
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _unescape(payload: str) -> str:
+    # Reverses the dispatcher's escape() in one pass, so an escaped backslash
+    # followed by "n" isn't mistaken for a newline
+    return re.sub(r"\\(.)", lambda m: "\n" if m[1] == "n" else m[1], payload)
+
+
+class AsepriteDaemon:
+    """A long-lived Aseprite process that executes Lua scripts on request."""
+
+    def __init__(self, aseprite_path: str) -> None:
+        self.aseprite_path = aseprite_path
+        self._lock = threading.Lock()
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._workdir: Path | None = None
+        self._request_fd = -1
+        self._response_fd = -1
+        self._buffer = b""
+        self._mtimes: dict[str, int | None] = {}
+
+    @property
+    def running(self) -> bool:
+        """Whether the Aseprite process is alive."""
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        """Spawn Aseprite with the dispatcher script.
+
+        Raises:
+            AsepriteCommandError: If the process cannot be started
+        """
+        self._workdir = Path(tempfile.mkdtemp(prefix="aseprite-mcp-daemon-"))
+        requests = self._workdir / "requests"
+        responses = self._workdir / "responses"
+        dispatcher = self._workdir / "dispatcher.lua"
+        os.mkfifo(requests)
+        os.mkfifo(responses)
+        dispatcher.write_text(DISPATCHER_SCRIPT, encoding="utf-8")
+
+        # Both ends are opened read-write so neither side ever sees EOF or
+        # blocks on open while the other one is busy.
+        self._request_fd = os.open(requests, os.O_RDWR)
+        self._response_fd = os.open(responses, os.O_RDWR | os.O_NONBLOCK)
+        self._buffer = b""
+        self._mtimes.clear()
+
+        cmd = [
+            self.aseprite_path,
+            "--batch",
+            "--script-param",
+            f"requests={requests}",
+            "--script-param",
+            f"responses={responses}",
+            "--script",
+            str(dispatcher),
+        ]
+        logger.info(f"Starting Aseprite daemon: {' '.join(cmd)}")
+
+        try:
+            self._proc = subprocess.Popen(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self.stop()
+            raise AsepriteCommandError(
+                f"Failed to start Aseprite daemon: {e}", cmd
+            ) from e
+
+    def stop(self) -> None:
+        """Ask the dispatcher to exit and clean up the FIFOs."""
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                try:
+                    os.write(self._request_fd, b"EXIT\n")
+                    self._proc.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._proc.kill()
+            self._proc = None
+
+        for fd in (self._request_fd, self._response_fd):
+            if fd >= 0:
+                os.close(fd)
+        self._request_fd = self._response_fd = -1
+
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+
+    def run_script(
+        self,
+        script_path: str | Path,
+        filename: str | Path | None = None,
+        timeout: int = 30,
+    ) -> tuple[bool, str]:
+        """Run a Lua script file in the daemon.
+
+        Args:
+            script_path: Path of the Lua script to run
+            filename: Optional sprite to open before running the script
+            timeout: Script execution timeout in seconds
+
+        Returns:
+            tuple: (success, output)
+
+        Raises:
+            AsepriteCommandError: If the daemon dies or the script times out
+        """
+        with self._lock:
+            if not self.running:
+                self.stop()
+                self.start()
+
+            # Reload the sprite if its file changed since the daemon last saw it
+            key = str(filename or "")
+            reload = key in self._mtimes and self._mtimes[key] != _mtime(key)
+
+            token = uuid.uuid4().hex
+            request = f"{token}\t{int(reload)}\t{key}\t{script_path}\n"
+            os.write(self._request_fd, request.encode("utf-8"))
+
+            deadline = time.monotonic() + timeout
+            while True:
+                line = self._read_line(deadline)
+                reply_token, status, payload = line.split("\t", 2)
+                if reply_token == token:
+                    break
+                logger.debug(f"Discarding stale daemon response {reply_token}")
+
+            if key:
+                self._mtimes[key] = _mtime(key)
+            return status == "OK", _unescape(payload)
+
+    def _read_line(self, deadline: float) -> str:
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # The dispatcher is stuck on this script; start afresh next time
+                if self._proc is not None:
+                    self._proc.kill()
+                self.stop()
+                raise AsepriteCommandError("Script timed out in Aseprite daemon")
+            if not self.running:
+                self.stop()
+                raise AsepriteCommandError("Aseprite daemon exited unexpectedly")
+            wait = min(remaining, 0.5)
+            ready, _, _ = select.select([self._response_fd], [], [], wait)
+            if ready:
+                self._buffer += os.read(self._response_fd, 65536)
+
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line.decode("utf-8", errors="replace")
+
+
+_daemon: AsepriteDaemon | None = None
+
+
+def get_daemon(aseprite_path: str) -> AsepriteDaemon | None:
+    """Return the shared daemon if ``ASEPRITE_DAEMON`` is enabled.
+
+    Args:
+        aseprite_path: Aseprite executable to run
+
+    Returns:
+        The shared daemon, or None if daemon mode is disabled or unsupported
+    """
+    global _daemon
+    load_env()
+    if os.getenv("ASEPRITE_DAEMON", "").lower() not in ("1", "true", "yes"):
+        return None
+    if not hasattr(os, "mkfifo"):
+        return None
+
+    if _daemon is None or _daemon.aseprite_path != aseprite_path:
+        if _daemon is not None:
+            _daemon.stop()
+        _daemon = AsepriteDaemon(aseprite_path)
+        atexit.register(_daemon.stop)
+    return _daemon
@@ -0,0 +1,105 @@
+"""Minimal reader for the binary .aseprite/.ase file header.
+
+Reading a few fields straight from the file is much cheaper than starting
+Aseprite just to ask for them. See the Aseprite file format specification:
+https://github.com/aseprite/aseprite/blob/main/docs/ase-file-specs.md
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+HEADER_SIZE = 128
+HEADER_MAGIC = 0xA5E0
+
+# DWORD file size, WORD magic, WORD frames, WORD width, WORD height, WORD depth
+_HEADER = struct.Struct("<IHHHHH")
+
+# DWORD frame size, WORD magic, WORD old chunk count, WORD duration,
+# 2 reserved bytes, DWORD new chunk count
+_FRAME = struct.Struct("<IHHH2xI")
+FRAME_MAGIC = 0xF1FA
+
+# DWORD chunk size, WORD chunk type
+_CHUNK = struct.Struct("<IH")
+LAYER_CHUNK = 0x2004
+
+# Layer chunk data starts with WORD flags, WORD layer type, WORD child level
+_LAYER = struct.Struct("<HHH")
+
+# Aseprite's ColorMode values by color depth in bits per pixel
+_COLOR_MODES = {32: 0, 16: 1, 8: 2}
+
+
+@dataclass(frozen=True)
+class SpriteHeader:
+    """Sprite properties stored in the file header."""
+
+    width: int
+    height: int
+    frames: int
+    color_mode: int
+
+
+def read_header(filename: str | Path) -> SpriteHeader | None:
+    """Read the header of an Aseprite file.
+
+    Args:
+        filename: Path to the .aseprite/.ase file
+
+    Returns:
+        The parsed header, or None if the file can't be read or isn't a
+        supported Aseprite file
+    """
+    try:
+        with open(filename, "rb") as f:
+            data = f.read(HEADER_SIZE)
+        _, magic, frames, width, height, depth = _HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+
+    if magic != HEADER_MAGIC or depth not in _COLOR_MODES:
+        return None
+
+    return SpriteHeader(
+        width=width, height=height, frames=frames, color_mode=_COLOR_MODES[depth]
+    )
+
+
+def count_layers(filename: str | Path) -> int | None:
+    """Count the top-level layers of an Aseprite file.
+
+    Layers are all declared in the first frame, so only that frame's chunk
+    headers are read; chunk contents other than layer chunks are skipped.
+    Layers nested in groups are not counted, matching ``#sprite.layers``.
+
+    Args:
+        filename: Path to the .aseprite/.ase file
+
+    Returns:
+        Number of top-level layers, or None if the file can't be parsed
+    """
+    try:
+        with open(filename, "rb") as f:
+            f.seek(HEADER_SIZE)
+            _, magic, old_chunks, _, new_chunks = _FRAME.unpack(f.read(_FRAME.size))
+            if magic != FRAME_MAGIC:
+                return None
+
+            layers = 0
+            for _ in range(new_chunks or old_chunks):
+                start = f.tell()
+                size, chunk_type = _CHUNK.unpack(f.read(_CHUNK.size))
+                if size < _CHUNK.size:
+                    return None
+                if chunk_type == LAYER_CHUNK:
+                    _, _, child_level = _LAYER.unpack(f.read(_LAYER.size))
+                    if child_level == 0:
+                        layers += 1
+                f.seek(start + size)
+    except (OSError, struct.error):
+        return None
+
+    return layers
@@ -0,0 +1,121 @@
+"""Helpers for assembling the Lua scripts executed inside Aseprite."""
+
+from __future__ import annotations
+
+from string import Template
+
+# Escapes for every character that cannot appear as-is in a Lua string literal
+_LUA_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    '"': '\\"',
+    "\n": "\\n",
+    "\r": "\\r",
+    "\0": "\\000",
+})
+
+
+def lua_quote(value: str) -> str:
+    """Quote a string as a Lua string literal.
+
+    Args:
+        value: String to embed in a Lua script, e.g. a filename or layer name
+
+    Returns:
+        Double-quoted Lua literal that evaluates to ``value``
+    """
+    return '"' + value.translate(_LUA_ESCAPES) + '"'
+
+
+# Fetches the sprite opened on the command line and bails out if there is none
+SPRITE_PRELUDE = """
+    local spr = app.activeSprite
+    if not spr then
+        return "Error: No active sprite"
+    end
+"""
+
+# Makes sure there is a cel to draw on, creating one on the first layer/frame
+ENSURE_CEL = """
+        local cel = app.activeCel
+        if not cel then
+            app.activeLayer = spr.layers[1]
+            app.activeFrame = spr.frames[1]
+            cel = spr:newCel(app.activeLayer, app.activeFrame)
+            if not cel then
+                return "Error: Could not create cel"
+            end
+        end
+"""
+
+
+# Error returned by tools asked not to save when the edit would be lost
+AUTOSAVE_REQUIRES_DAEMON = (
+    "Error: autosave=False requires ASEPRITE_DAEMON, otherwise the unsaved "
+    "changes are discarded when Aseprite exits"
+)
+
+SAVE = """
+    spr:saveAs(spr.filename)
+"""
+
+_SPRITE_SCRIPT = Template(SPRITE_PRELUDE + """
+    app.transaction("$label", function()
+$body
+    end)
+$save
+    return "$message"
+    """)
+
+
+def sprite_script(label: str, body: str, message: str, autosave: bool = True) -> str:
+    """Wrap an operation body into a complete sprite script.
+
+    Args:
+        label: Undo label for the transaction
+        body: Lua statements run inside the transaction
+        message: Value returned by the script on success
+        autosave: Whether the script saves the sprite afterwards
+
+    Returns:
+        Complete Lua script
+    """
+    return _SPRITE_SCRIPT.substitute(
+        label=label, body=body, save=SAVE if autosave else "", message=message
+    )
+
+
+def batch_script(bodies: list[str]) -> str:
+    """Combine several operation bodies into a single transaction and save.
+
+    Each body runs in its own local function, so its ``return`` only ends
+    that operation. An error message returned by an operation is raised as a
+    Lua error, which rolls back the whole batch, skips the save and makes the
+    run fail with that message.
+
+    Args:
+        bodies: Lua operation bodies, in execution order
+
+    Returns:
+        Complete Lua script
+    """
+    ops = "".join(
+        f"""
+        do
+            local function op()
+{body}
+            end
+            local err = op()
+            if err then
+                error(err, 0)
+            end
+        end
+"""
+        for body in bodies
+    )
+    return f"""{SPRITE_PRELUDE}
+    app.transaction("Batch", function()
+{ops}
+    end)
+{SAVE}
+    return "Batch applied successfully"
+    """
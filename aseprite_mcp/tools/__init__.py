@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 # Import all tools to register them with the MCP server
+from . import batch  # noqa: F401
 from . import canvas  # noqa: F401
 from . import drawing  # noqa: F401
 from . import export  # noqa: F401
 from . import file_router  # noqa: F401
 
-__all__ = ["canvas", "drawing", "export", "file_router"]
\ No newline at end of file
+__all__ = ["batch", "canvas", "drawing", "export", "file_router"]
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Batching tools for Aseprite MCP.
+
+Every drawing call normally pays for a full Aseprite start-up and a full save
+of the sprite. These tools let callers queue many operations and apply them
+with a single Aseprite run.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ..core import batch
+from ..core.commands import AsepriteCommand, AsepriteCommandError
+from ..core.scripts import batch_script
+from .. import mcp
+from . import canvas, drawing
+
+logger = logging.getLogger(__name__)
+
+# Tools whose operations can be queued while a batch is open
+BATCHABLE_TOOLS: dict[str, Callable[..., Awaitable[str]]] = {
+    "draw_pixels": drawing.draw_pixels,
+    "draw_line": drawing.draw_line,
+    "draw_rectangle": drawing.draw_rectangle,
+    "fill_area": drawing.fill_area,
+    "draw_circle": drawing.draw_circle,
+    "add_layer": canvas.add_layer,
+    "add_frame": canvas.add_frame,
+    "modify_sprite": canvas.modify_sprite,
+}
+
+
+@mcp.tool()
+async def begin_batch(filename: str) -> str:
+    """Start queueing operations for an Aseprite file.
+
+    Until flush_batch is called, drawing and layer/frame tools called on this
+    file are queued instead of being executed immediately.
+
+    Args:
+        filename: Name of the Aseprite file to batch operations for
+
+    Returns:
+        Status message indicating success or failure
+    """
+    try:
+        file_path = AsepriteCommand.validate_file_exists(filename)
+        batch.begin(file_path)
+    except AsepriteCommandError as e:
+        return str(e)
+
+    logger.info(f"Batch opened for {filename}")
+    return f"Batch opened for {filename}"
+
+
+async def _flush_batch() -> str:
+    """Apply the open batch; see flush_batch."""
+    file_path, ops = batch.take()
+    if file_path is None:
+        return "Error: No batch is open"
+
+    if not ops:
+        return f"Batch for {file_path} was empty, nothing to apply"
+
+    script = batch_script([body for _, body in ops])
+
+    try:
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
+
+        if success:
+            logger.info(f"Applied {len(ops)} batched operations to {file_path}")
+            lines = [f"Batch applied {len(ops)} operations to {file_path}:"]
+            lines.extend(
+                f"  {i}. {description}" for i, (description, _) in enumerate(ops, 1)
+            )
+            return "\n".join(lines)
+        else:
+            logger.error(f"Failed to apply batch: {output}")
+            return f"Failed to apply batch: {output}"
+
+    except AsepriteCommandError as e:
+        logger.error(f"Aseprite command error: {e}")
+        return f"Error executing Aseprite command: {e}"
+
+
+@mcp.tool()
+async def flush_batch() -> str:
+    """Apply all queued operations in a single Aseprite run.
+
+    Returns:
+        Status message listing the applied operations
+    """
+    return await _flush_batch()
+
+
+def _check_operations(operations: list[dict[str, Any]]) -> None:
+    """Check the shape of draw_batch operations before anything is queued.
+
+    Raises:
+        ValueError: If an operation is invalid, with a message naming it
+    """
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict):
+            raise ValueError(f"Operation {i} is not a dictionary")
+        if op.get("tool") not in BATCHABLE_TOOLS:
+            supported = ", ".join(BATCHABLE_TOOLS)
+            raise ValueError(
+                f"Operation {i} has unsupported tool '{op.get('tool')}'. "
+                f"Supported tools: {supported}"
+            )
+        if not isinstance(op.get("args", {}), dict):
+            raise ValueError(f"Operation {i} args must be a dictionary")
+
+
+@mcp.tool()
+async def draw_batch(filename: str, operations: list[dict[str, Any]]) -> str:
+    """Apply several operations to a file with a single Aseprite run.
+
+    Args:
+        filename: Name of the Aseprite file to modify
+        operations: List of operations, each containing:
+            {"tool": str, "args": dict, "description": str (optional)}
+            where tool is one of draw_pixels, draw_line, draw_rectangle,
+            fill_area, draw_circle, add_layer, add_frame or modify_sprite,
+            and args are that tool's arguments without the filename
+
+    Returns:
+        Status message listing the applied operations
+    """
+    if not operations:
+        return "Error: No operations provided"
+
+    try:
+        _check_operations(operations)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    try:
+        file_path = AsepriteCommand.validate_file_exists(filename)
+        batch.begin(file_path)
+    except AsepriteCommandError as e:
+        return str(e)
+
+    # Whatever stops the loop early, the batch must not stay open
+    queued = False
+    try:
+        for i, op in enumerate(operations):
+            # An operation succeeded if it added exactly one op to the batch
+            before = batch.pending()
+            try:
+                tool = BATCHABLE_TOOLS[op["tool"]]
+                result = await tool(filename, **op.get("args", {}))
+            except Exception as e:
+                result = f"Error: {e}"
+
+            if batch.pending() != before + 1:
+                return f"Error: Operation {i} ({op['tool']}) failed: {result}"
+
+            if "description" in op:
+                batch.describe_last(str(op["description"]))
+        queued = True
+    finally:
+        if not queued:
+            batch.take()
+
+    return await _flush_batch()
@@ -4,12 +4,67 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
+from string import Template
 
+from ..core import batch
 from ..core.commands import AsepriteCommand, AsepriteCommandError
+from ..core.fileformat import count_layers, read_header
+from ..core.scripts import (
+    AUTOSAVE_REQUIRES_DAEMON,
+    SAVE,
+    SPRITE_PRELUDE,
+    lua_quote,
+    sprite_script,
+)
 from .. import mcp
 
 logger = logging.getLogger(__name__)
 
+# Lua scripts and operation bodies, built once; each call only substitutes
+# its values
+_CREATE_CANVAS_SCRIPT = Template("""
+    local filename = $filename
+    local spr = Sprite($width, $height)
+    if spr then
+        spr:saveAs(filename)
+        return "Canvas created successfully: " .. filename
+    else
+        return "Failed to create sprite"
+    end
+    """)
+
+_ADD_LAYERS_BODY = Template("""
+        for _, name in ipairs({$names}) do
+            local new_layer = spr:newLayer()
+            if not new_layer then
+                return "Error: Failed to create layer"
+            end
+            new_layer.name = name
+        end
+    """)
+
+_ADD_FRAMES_BODY = Template("""
+        for i = 1, $count do
+            if not spr:newFrame() then
+                return "Error: Failed to create frame"
+            end
+        end
+    """)
+
+_SAVE_SCRIPT = f"""{SPRITE_PRELUDE}{SAVE}
+    return "File saved successfully"
+    """
+
+
+def _modify_body(layer_names: list[str], frames: int) -> str:
+    """Build the Lua body adding the given layers and number of frames."""
+    body = ""
+    if layer_names:
+        body += _ADD_LAYERS_BODY.substitute(names=",".join(map(lua_quote, layer_names)))
+    if frames:
+        body += _ADD_FRAMES_BODY.substitute(count=frames)
+    return body
+
 
 @mcp.tool()
 async def create_canvas(
@@ -37,18 +92,12 @@ async def create_canvas(
     if file_path.suffix.lower() not in [".aseprite", ".ase"]:
         filename = f"{file_path.stem}.aseprite"
 
-    script = f"""
-    local spr = Sprite({width}, {height})
-    if spr then
-        spr:saveAs("{filename}")
-        return "Canvas created successfully: {filename}"
-    else
-        return "Failed to create sprite"
-    end
-    """
+    script = _CREATE_CANVAS_SCRIPT.substitute(
+        width=width, height=height, filename=lua_quote(filename)
+    )
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script)
+        success, output = await AsepriteCommand.execute_lua_script_async(script)
 
         if success:
             logger.info(f"Canvas created: {filename} ({width}x{height})")
@@ -63,12 +112,14 @@ async def create_canvas(
 
 
 @mcp.tool()
-async def add_layer(filename: str, layer_name: str) -> str:
+async def add_layer(filename: str, layer_name: str, autosave: bool = True) -> str:
     """Add a new layer to the Aseprite file.
 
     Args:
         filename: Name of the Aseprite file to modify
         layer_name: Name of the new layer (must not be empty)
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -81,30 +132,24 @@ async def add_layer(filename: str, layer_name: str) -> str:
     except AsepriteCommandError as e:
         return str(e)
 
-    # Escape layer name for Lua
-    escaped_name = layer_name.replace('"', '\\"')
+    body = _modify_body([layer_name], 0)
 
-    script = f"""
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
+    if batch.is_open(file_path):
+        count = batch.queue(f"Add layer '{layer_name}'", body)
+        return (
+            f"Queued layer '{layer_name}' for {filename} "
+            f"({count} operations pending)"
+        )
 
-    app.transaction("Add Layer", function()
-        local new_layer = spr:newLayer()
-        if new_layer then
-            new_layer.name = "{escaped_name}"
-        else
-            return "Error: Failed to create layer"
-        end
-    end)
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
 
-    spr:saveAs(spr.filename)
-    return "Layer added successfully"
-    """
+    script = sprite_script("Add Layer", body, "Layer added successfully", autosave)
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
         if success:
             logger.info(f"Layer '{layer_name}' added to {filename}")
@@ -119,11 +164,13 @@ async def add_layer(filename: str, layer_name: str) -> str:
 
 
 @mcp.tool()
-async def add_frame(filename: str) -> str:
+async def add_frame(filename: str, autosave: bool = True) -> str:
     """Add a new frame to the Aseprite file.
 
     Args:
         filename: Name of the Aseprite file to modify
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -133,25 +180,21 @@ async def add_frame(filename: str) -> str:
     except AsepriteCommandError as e:
         return str(e)
 
-    script = """
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
+    body = _modify_body([], 1)
 
-    app.transaction("Add Frame", function()
-        local new_frame = spr:newFrame()
-        if not new_frame then
-            return "Error: Failed to create frame"
-        end
-    end)
+    if batch.is_open(file_path):
+        count = batch.queue("Add frame", body)
+        return f"Queued new frame for {filename} ({count} operations pending)"
 
-    spr:saveAs(spr.filename)
-    return "Frame added successfully"
-    """
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
+
+    script = sprite_script("Add Frame", body, "Frame added successfully", autosave)
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
         if success:
             logger.info(f"Frame added to {filename}")
@@ -165,6 +208,105 @@ async def add_frame(filename: str) -> str:
         return f"Error executing Aseprite command: {e}"
 
 
+@mcp.tool()
+async def modify_sprite(
+    filename: str,
+    add_layers: list[str] | None = None,
+    add_frames: int = 0,
+    autosave: bool = True,
+) -> str:
+    """Add several layers and frames to an Aseprite file in one step.
+
+    Args:
+        filename: Name of the Aseprite file to modify
+        add_layers: Names of the layers to add, in order (default: none)
+        add_frames: Number of frames to add (default: 0, max: 1000)
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
+
+    Returns:
+        Status message indicating success or failure
+    """
+    layer_names = add_layers or []
+    if any(not name.strip() for name in layer_names):
+        return "Error: Layer name cannot be empty"
+
+    if add_frames < 0 or add_frames > 1000:
+        return "Error: Number of frames to add must be between 0 and 1000"
+
+    if not layer_names and not add_frames:
+        return "Error: No layers or frames to add"
+
+    try:
+        file_path = AsepriteCommand.validate_file_exists(filename)
+    except AsepriteCommandError as e:
+        return str(e)
+
+    body = _modify_body(layer_names, add_frames)
+    summary = f"{len(layer_names)} layers and {add_frames} frames"
+
+    if batch.is_open(file_path):
+        count = batch.queue(f"Add {summary}", body)
+        return f"Queued {summary} for {filename} ({count} operations pending)"
+
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
+
+    script = sprite_script(
+        "Modify Sprite", body, "Sprite modified successfully", autosave
+    )
+
+    try:
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
+
+        if success:
+            logger.info(f"Added {summary} to {filename}")
+            return f"Added {summary} successfully to {filename}"
+        else:
+            logger.error(f"Failed to modify sprite: {output}")
+            return f"Failed to modify sprite: {output}"
+
+    except AsepriteCommandError as e:
+        logger.error(f"Aseprite command error: {e}")
+        return f"Error executing Aseprite command: {e}"
+
+
+@mcp.tool()
+async def save_file(filename: str) -> str:
+    """Save an Aseprite file, writing out changes made with autosave=False.
+
+    Args:
+        filename: Name of the Aseprite file to save
+
+    Returns:
+        Status message indicating success or failure
+    """
+    try:
+        file_path = AsepriteCommand.validate_file_exists(filename)
+    except AsepriteCommandError as e:
+        return str(e)
+
+    script = _SAVE_SCRIPT
+
+    try:
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
+
+        if success:
+            logger.info(f"Saved {filename}")
+            return f"File saved successfully: {filename}"
+        else:
+            logger.error(f"Failed to save file: {output}")
+            return f"Failed to save file: {output}"
+
+    except AsepriteCommandError as e:
+        logger.error(f"Aseprite command error: {e}")
+        return f"Error executing Aseprite command: {e}"
+
+
 @mcp.tool()
 async def get_canvas_info(filename: str) -> str:
     """Get information about an Aseprite canvas.
@@ -180,6 +322,17 @@ async def get_canvas_info(filename: str) -> str:
     except AsepriteCommandError as e:
         return str(e)
 
+    # Everything needed is in the file itself, so only ask Aseprite if the file
+    # can't be parsed here or the daemon may hold unsaved changes to it
+    if not AsepriteCommand.uses_daemon():
+        header = read_header(file_path)
+        layers = count_layers(file_path) if header is not None else None
+        if header is not None and layers is not None:
+            return (
+                f"Canvas: {header.width}x{header.height}, Layers: {layers}, "
+                f"Frames: {header.frames}, Color Mode: {header.color_mode}"
+            )
+
     script = """
     local spr = app.activeSprite
     if not spr then
@@ -201,7 +354,9 @@ async def get_canvas_info(filename: str) -> str:
     """
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
         if success:
             return output
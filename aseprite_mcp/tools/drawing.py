@@ -2,15 +2,67 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import re
+from string import Template
 from typing import Any
 
+from ..core import batch
 from ..core.commands import AsepriteCommand, AsepriteCommandError
+from ..core.fileformat import read_header
+from ..core.scripts import AUTOSAVE_REQUIRES_DAEMON, ENSURE_CEL, sprite_script
 from .. import mcp
 
 logger = logging.getLogger(__name__)
 
+# Six uppercase hex digits, matched against the whole normalized color
+_HEX_COLOR_RE = re.compile(r"[0-9A-F]{6}")
+
+# Lua operation bodies, built once; each call only substitutes its values
+_PIXELS_BODY = Template(ENSURE_CEL + """
+        local img = cel.image
+        local P = {$pixels}
+        local w, h = img.width, img.height
+        local pc = app.pixelColor
+        local rgb = img.colorMode == ColorMode.RGB
+        for i = 1, #P, 3 do
+            local x, y, v = P[i], P[i + 1], P[i + 2]
+            if $in_bounds then
+                if rgb then
+                    img:drawPixel(x, y, v)
+                else
+                    img:drawPixel(x, y, Color(
+                        pc.rgbaR(v), pc.rgbaG(v), pc.rgbaB(v), 255
+                    ))
+                end
+            end
+        end
+    """)
+
+_LINE_BODY = Template(ENSURE_CEL + """
+        local color = Color($r, $g, $b, 255)
+        local brush = Brush()
+        brush.size = $thickness
+
+        app.useTool({
+            tool="line",
+            color=color,
+            brush=brush,
+            points={Point($x1, $y1), Point($x2, $y2)}
+        })
+    """)
+
+# Two-point shape tools: rectangles, ellipses (bounding box) and fills
+_SHAPE_BODY = Template(ENSURE_CEL + """
+        local color = Color($r, $g, $b, 255)
+        app.useTool({
+            tool="$tool",
+            color=color,
+            points={$points}
+        })
+    """)
+
 
 def validate_hex_color(color: str) -> tuple[bool, str]:
     """Validate and normalize a hex color string.
@@ -25,7 +77,7 @@ def validate_hex_color(color: str) -> tuple[bool, str]:
     color = color.lstrip("#").upper()
 
     # Validate hex format
-    if not re.match(r"^[0-9A-F]{6}$", color):
+    if not _HEX_COLOR_RE.fullmatch(color):
         return False, color
 
     return True, color
@@ -40,14 +92,64 @@ def hex_to_rgb(color: str) -> tuple[int, int, int]:
     Returns:
         tuple: (r, g, b) values
     """
-    r = int(color[0:2], 16)
-    g = int(color[2:4], 16)
-    b = int(color[4:6], 16)
+    r, g, b = bytes.fromhex(color)
     return r, g, b
 
 
+def _parse_pixels(pixels: list[dict[str, Any]]) -> list[int]:
+    """Validate pixel data and pack it in a single pass.
+
+    Args:
+        pixels: Pixel dictionaries as passed to draw_pixels
+
+    Returns:
+        Flat list of x, y, value triples, where value uses Aseprite's RGBA
+        pixel layout (see app.pixelColor.rgba)
+
+    Raises:
+        ValueError: If a pixel is invalid, with a message naming it
+    """
+    values: list[int] = []
+    # Drawings typically use a handful of colors, so each one is parsed once
+    packed: dict[str, int] = {}
+    for i, pixel in enumerate(pixels):
+        if not isinstance(pixel, dict):
+            raise ValueError(f"Pixel {i} is not a dictionary")
+
+        x = pixel.get("x")
+        y = pixel.get("y")
+        color = pixel.get("color")
+        if x is None or y is None or color is None:
+            missing = "x" if x is None else "y" if y is None else "color"
+            raise ValueError(f"Pixel {i} missing required key '{missing}'")
+
+        # Validate coordinates; exact type check so booleans are rejected
+        if type(x) is not int or type(y) is not int:
+            raise ValueError(f"Pixel {i} coordinates must be integers")
+
+        if x < 0 or y < 0:
+            raise ValueError(f"Pixel {i} coordinates must be non-negative")
+
+        # Validate color
+        if not isinstance(color, str):
+            raise ValueError(f"Pixel {i} has invalid color format '{color}'")
+        value = packed.get(color)
+        if value is None:
+            is_valid, normalized_color = validate_hex_color(color)
+            if not is_valid:
+                raise ValueError(f"Pixel {i} has invalid color format '{color}'")
+            r, g, b = hex_to_rgb(normalized_color)
+            value = packed[color] = 0xFF000000 | (b << 16) | (g << 8) | r
+
+        values += (x, y, value)
+
+    return values
+
+
 @mcp.tool()
-async def draw_pixels(filename: str, pixels: list[dict[str, Any]]) -> str:
+async def draw_pixels(
+    filename: str, pixels: list[dict[str, Any]], autosave: bool = True
+) -> str:
     """Draw pixels on the canvas with specified colors.
 
     Args:
@@ -55,6 +157,8 @@ async def draw_pixels(filename: str, pixels: list[dict[str, Any]]) -> str:
         pixels: List of pixel data, each containing:
             {"x": int, "y": int, "color": str}
             where color is a hex code like "#FF0000"
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -62,80 +166,66 @@ async def draw_pixels(filename: str, pixels: list[dict[str, Any]]) -> str:
     if not pixels:
         return "Error: No pixels provided"
 
+    try:
+        values = _parse_pixels(pixels)
+    except ValueError as e:
+        return f"Error: {e}"
+
     try:
         file_path = AsepriteCommand.validate_file_exists(filename)
     except AsepriteCommandError as e:
         return str(e)
 
-    # Validate pixel data
-    for i, pixel in enumerate(pixels):
-        if not isinstance(pixel, dict):
-            return f"Error: Pixel {i} is not a dictionary"
-
-        required_keys = ["x", "y", "color"]
-        for key in required_keys:
-            if key not in pixel:
-                return f"Error: Pixel {i} missing required key '{key}'"
-
-        # Validate coordinates
-        if not isinstance(pixel["x"], int) or not isinstance(pixel["y"], int):
-            return f"Error: Pixel {i} coordinates must be integers"
-
-        if pixel["x"] < 0 or pixel["y"] < 0:
-            return f"Error: Pixel {i} coordinates must be non-negative"
-
-        # Validate color
-        is_valid, _ = validate_hex_color(pixel["color"])
-        if not is_valid:
-            return f"Error: Pixel {i} has invalid color format '{pixel['color']}'"
-
-    script = """
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
-
-    app.transaction("Draw Pixels", function()
-        local cel = app.activeCel
-        if not cel then
-            -- Create a new cel if none exists
-            app.activeLayer = spr.layers[1]
-            app.activeFrame = spr.frames[1]
-            cel = spr:newCel(app.activeLayer, app.activeFrame)
-            if not cel then
-                return "Error: Could not create cel"
-            end
-        end
-
-        local img = cel.image
-    """
-
-    # Add pixel drawing commands
-    for pixel in pixels:
-        x = pixel["x"]
-        y = pixel["y"]
-        is_valid, normalized_color = validate_hex_color(pixel["color"])
-        if is_valid:
-            r, g, b = hex_to_rgb(normalized_color)
-            script += f"""
-        if {x} >= 0 and {y} >= 0 and {x} < img.width and {y} < img.height then
-            img:putPixel({x}, {y}, Color({r}, {g}, {b}, 255))
-        end
-        """
-
-    script += """
-    end)
-
-    spr:saveAs(spr.filename)
-    return "Pixels drawn successfully"
-    """
+    # Drop pixels outside the canvas here when the file header tells us its
+    # size, so the script doesn't carry them or check bounds per pixel
+    in_bounds = "x < w and y < h"
+    skipped = 0
+    header = read_header(file_path)
+    if header is not None:
+        width, height = header.width, header.height
+        drawn: list[int] = []
+        for i in range(0, len(values), 3):
+            if values[i] < width and values[i + 1] < height:
+                drawn += values[i : i + 3]
+        skipped = (len(values) - len(drawn)) // 3
+        values, in_bounds = drawn, "true"
+        if not values:
+            return (
+            f"Error: All {skipped} pixels are outside the "
+            f"{width}x{height} canvas"
+        )
+    count = len(values) // 3
+
+    # One flat Lua table of x, y, value triples, so Lua can write raw
+    # integers instead of allocating a Color per pixel. The flat list of
+    # integers is rendered by the C JSON encoder; without the brackets it is
+    # a valid Lua table body.
+    table = json.dumps(values, separators=(",", ":"))[1:-1]
+
+    body = _PIXELS_BODY.substitute(pixels=table, in_bounds=in_bounds)
+
+    if batch.is_open(file_path):
+        pending = batch.queue(f"Draw {count} pixels", body)
+        return f"Queued {count} pixels for {filename} ({pending} operations pending)"
+
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
+
+    script = sprite_script("Draw Pixels", body, "Pixels drawn successfully", autosave)
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
         if success:
-            logger.info(f"Drew {len(pixels)} pixels in {filename}")
-            return f"Successfully drew {len(pixels)} pixels in {filename}"
+            logger.info(f"Drew {count} pixels in {filename}")
+            if skipped:
+                return (
+                    f"Successfully drew {count} pixels in {filename} "
+                    f"({skipped} outside the canvas skipped)"
+                )
+            return f"Successfully drew {count} pixels in {filename}"
         else:
             logger.error(f"Failed to draw pixels: {output}")
             return f"Failed to draw pixels: {output}"
@@ -154,6 +244,7 @@ async def draw_line(
     y2: int,
     color: str = "#000000",
     thickness: int = 1,
+    autosave: bool = True,
 ) -> str:
     """Draw a line on the canvas.
 
@@ -165,6 +256,8 @@ async def draw_line(
         y2: Ending y coordinate
         color: Hex color code (default: "#000000")
         thickness: Line thickness in pixels (default: 1, max: 100)
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -184,45 +277,33 @@ async def draw_line(
 
     r, g, b = hex_to_rgb(normalized_color)
 
-    script = f"""
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
-
-    app.transaction("Draw Line", function()
-        local cel = app.activeCel
-        if not cel then
-            app.activeLayer = spr.layers[1]
-            app.activeFrame = spr.frames[1]
-            cel = spr:newCel(app.activeLayer, app.activeFrame)
-            if not cel then
-                return "Error: Could not create cel"
-            end
-        end
+    body = _LINE_BODY.substitute(
+        r=r, g=g, b=b, thickness=thickness, x1=x1, y1=y1, x2=x2, y2=y2
+    )
 
-        local color = Color({r}, {g}, {b}, 255)
-        local brush = Brush()
-        brush.size = {thickness}
+    if batch.is_open(file_path):
+        count = batch.queue(f"Draw line from ({x1},{y1}) to ({x2},{y2})", body)
+        return (
+            f"Queued line from ({x1},{y1}) to ({x2},{y2}) for {filename} "
+            f"({count} operations pending)"
+        )
 
-        app.useTool({{
-            tool="line",
-            color=color,
-            brush=brush,
-            points={{Point({x1}, {y1}), Point({x2}, {y2})}}
-        }})
-    end)
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
 
-    spr:saveAs(spr.filename)
-    return "Line drawn successfully"
-    """
+    script = sprite_script("Draw Line", body, "Line drawn successfully", autosave)
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
         if success:
             logger.info(f"Drew line from ({x1},{y1}) to ({x2},{y2}) in {filename}")
-            return f"Line drawn successfully from ({x1},{y1}) to ({x2},{y2}) in {filename}"
+            return (
+                f"Line drawn successfully from ({x1},{y1}) to ({x2},{y2}) "
+                f"in {filename}"
+            )
         else:
             logger.error(f"Failed to draw line: {output}")
             return f"Failed to draw line: {output}"
@@ -241,6 +322,7 @@ async def draw_rectangle(
     height: int,
     color: str = "#000000",
     fill: bool = False,
+    autosave: bool = True,
 ) -> str:
     """Draw a rectangle on the canvas.
 
@@ -252,6 +334,8 @@ async def draw_rectangle(
         height: Height of the rectangle (must be > 0)
         color: Hex color code (default: "#000000")
         fill: Whether to fill the rectangle (default: False)
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -271,43 +355,39 @@ async def draw_rectangle(
 
     r, g, b = hex_to_rgb(normalized_color)
     tool = "filled_rectangle" if fill else "rectangle"
+    fill_text = "filled " if fill else ""
+    where = f"at ({x},{y}) size {width}x{height}"
 
-    script = f"""
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
-
-    app.transaction("Draw Rectangle", function()
-        local cel = app.activeCel
-        if not cel then
-            app.activeLayer = spr.layers[1]
-            app.activeFrame = spr.frames[1]
-            cel = spr:newCel(app.activeLayer, app.activeFrame)
-            if not cel then
-                return "Error: Could not create cel"
-            end
-        end
+    body = _SHAPE_BODY.substitute(
+        r=r, g=g, b=b, tool=tool,
+        points=f"Point({x}, {y}), Point({x + width}, {y + height})",
+    )
 
-        local color = Color({r}, {g}, {b}, 255)
-        app.useTool({{
-            tool="{tool}",
-            color=color,
-            points={{Point({x}, {y}), Point({x + width}, {y + height})}}
-        }})
-    end)
+    if batch.is_open(file_path):
+        count = batch.queue(f"Draw {fill_text}rectangle {where}", body)
+        return (
+            f"Queued {fill_text}rectangle {where} for {filename} "
+            f"({count} operations pending)"
+        )
 
-    spr:saveAs(spr.filename)
-    return "Rectangle drawn successfully"
-    """
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
+
+    script = sprite_script(
+        "Draw Rectangle", body, "Rectangle drawn successfully", autosave
+    )
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
-        fill_text = "filled " if fill else ""
         if success:
-            logger.info(f"Drew {fill_text}rectangle at ({x},{y}) size {width}x{height} in {filename}")
-            return f"{fill_text.title()}Rectangle drawn successfully at ({x},{y}) size {width}x{height} in {filename}"
+            logger.info(f"Drew {fill_text}rectangle {where} in {filename}")
+            return (
+                f"{fill_text.title()}Rectangle drawn successfully {where} "
+                f"in {filename}"
+            )
         else:
             logger.error(f"Failed to draw rectangle: {output}")
             return f"Failed to draw rectangle: {output}"
@@ -318,7 +398,9 @@ async def draw_rectangle(
 
 
 @mcp.tool()
-async def fill_area(filename: str, x: int, y: int, color: str = "#000000") -> str:
+async def fill_area(
+    filename: str, x: int, y: int, color: str = "#000000", autosave: bool = True
+) -> str:
     """Fill an area with color using the paint bucket tool.
 
     Args:
@@ -326,6 +408,8 @@ async def fill_area(filename: str, x: int, y: int, color: str = "#000000") -> st
         x: X coordinate to fill from
         y: Y coordinate to fill from
         color: Hex color code (default: "#000000")
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -341,37 +425,23 @@ async def fill_area(filename: str, x: int, y: int, color: str = "#000000") -> st
 
     r, g, b = hex_to_rgb(normalized_color)
 
-    script = f"""
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
-
-    app.transaction("Fill Area", function()
-        local cel = app.activeCel
-        if not cel then
-            app.activeLayer = spr.layers[1]
-            app.activeFrame = spr.frames[1]
-            cel = spr:newCel(app.activeLayer, app.activeFrame)
-            if not cel then
-                return "Error: Could not create cel"
-            end
-        end
+    body = _SHAPE_BODY.substitute(
+        r=r, g=g, b=b, tool="paint_bucket", points=f"Point({x}, {y})"
+    )
 
-        local color = Color({r}, {g}, {b}, 255)
-        app.useTool({{
-            tool="paint_bucket",
-            color=color,
-            points={{Point({x}, {y})}}
-        }})
-    end)
+    if batch.is_open(file_path):
+        count = batch.queue(f"Fill area at ({x},{y})", body)
+        return f"Queued fill at ({x},{y}) for {filename} ({count} operations pending)"
 
-    spr:saveAs(spr.filename)
-    return "Area filled successfully"
-    """
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
+
+    script = sprite_script("Fill Area", body, "Area filled successfully", autosave)
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
         if success:
             logger.info(f"Filled area at ({x},{y}) in {filename}")
@@ -393,6 +463,7 @@ async def draw_circle(
     radius: int,
     color: str = "#000000",
     fill: bool = False,
+    autosave: bool = True,
 ) -> str:
     """Draw a circle on the canvas.
 
@@ -403,6 +474,8 @@ async def draw_circle(
         radius: Radius of the circle in pixels (must be > 0)
         color: Hex color code (default: "#000000")
         fill: Whether to fill the circle (default: False)
+        autosave: Save the file afterwards (default: True). False keeps the
+                  change unsaved until save_file; requires ASEPRITE_DAEMON
 
     Returns:
         Status message indicating success or failure
@@ -421,46 +494,40 @@ async def draw_circle(
 
     r, g, b = hex_to_rgb(normalized_color)
     tool = "filled_ellipse" if fill else "ellipse"
+    fill_text = "filled " if fill else ""
+    where = f"at ({center_x},{center_y}) radius {radius}"
 
-    script = f"""
-    local spr = app.activeSprite
-    if not spr then
-        return "Error: No active sprite"
-    end
-
-    app.transaction("Draw Circle", function()
-        local cel = app.activeCel
-        if not cel then
-            app.activeLayer = spr.layers[1]
-            app.activeFrame = spr.frames[1]
-            cel = spr:newCel(app.activeLayer, app.activeFrame)
-            if not cel then
-                return "Error: Could not create cel"
-            end
-        end
+    body = _SHAPE_BODY.substitute(
+        r=r, g=g, b=b, tool=tool,
+        points=(
+            f"Point({center_x - radius}, {center_y - radius}), "
+            f"Point({center_x + radius}, {center_y + radius})"
+        ),
+    )
 
-        local color = Color({r}, {g}, {b}, 255)
-        app.useTool({{
-            tool="{tool}",
-            color=color,
-            points={{
-                Point({center_x - radius}, {center_y - radius}),
-                Point({center_x + radius}, {center_y + radius})
-            }}
-        }})
-    end)
-
-    spr:saveAs(spr.filename)
-    return "Circle drawn successfully"
-    """
+    if batch.is_open(file_path):
+        count = batch.queue(f"Draw {fill_text}circle {where}", body)
+        return (
+            f"Queued {fill_text}circle {where} for {filename} "
+            f"({count} operations pending)"
+        )
+
+    if not autosave and not AsepriteCommand.uses_daemon():
+        return AUTOSAVE_REQUIRES_DAEMON
+
+    script = sprite_script("Draw Circle", body, "Circle drawn successfully", autosave)
 
     try:
-        success, output = AsepriteCommand.execute_lua_script(script, file_path)
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            script, file_path
+        )
 
-        fill_text = "filled " if fill else ""
         if success:
-            logger.info(f"Drew {fill_text}circle at ({center_x},{center_y}) radius {radius} in {filename}")
-            return f"{fill_text.title()}Circle drawn successfully at ({center_x},{center_y}) radius {radius} in {filename}"
+            logger.info(f"Drew {fill_text}circle {where} in {filename}")
+            return (
+                f"{fill_text.title()}Circle drawn successfully {where} "
+                f"in {filename}"
+            )
         else:
             logger.error(f"Failed to draw circle: {output}")
             return f"Failed to draw circle: {output}"
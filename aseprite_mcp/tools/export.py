@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 import os
+import time
 from pathlib import Path
 
-from ..core.commands import AsepriteCommand, AsepriteCommandError
+from ..core.commands import AsepriteCommand, AsepriteCommandError, load_env
 from .. import mcp
 
 logger = logging.getLogger(__name__)
@@ -22,12 +24,61 @@ SUPPORTED_FORMATS = {
     "webp": "WebP image",
 }
 
+# Per-format extension and the format list for error messages, built once
+_DOT_SUFFIX = {fmt: f".{fmt}" for fmt in SUPPORTED_FORMATS}
+_SUPPORTED_JOINED = ", ".join(SUPPORTED_FORMATS)
+
+# Formats usable for animations and sprite sheets
+_ANIM_FORMATS = frozenset({"gif", "webp"})
+_SHEET_FORMATS = frozenset({"png", "jpg", "jpeg", "bmp", "tga"})
+
+# Sprite sheet layouts, in the order listed in error messages
+SHEET_TYPES = ("horizontal", "vertical", "rows", "columns", "packed")
+_SHEET_TYPES_SET = frozenset(SHEET_TYPES)
+_SHEET_TYPES_JOINED = ", ".join(SHEET_TYPES)
+
+
+# How long a successful source-file check is reused, in seconds
+VALIDATION_TTL = 5
+
+
+@functools.lru_cache(maxsize=256)
+def _validated_source(filename: str, _bucket: int) -> str | Path:
+    # Only successful checks are cached, since lru_cache doesn't store
+    # exceptions; the time bucket in the key makes entries expire
+    return AsepriteCommand.validate_file_exists(filename)
+
+
+def validate_source(filename: str) -> str | Path:
+    """Validate an export source file, reusing recent successful checks.
+
+    The same sprite is commonly exported to several targets in a row, so a
+    file found to exist is not checked again for a few seconds.
+
+    Args:
+        filename: Path to the Aseprite file to export
+
+    Returns:
+        The validated filename
+
+    Raises:
+        AsepriteCommandError: If the file doesn't exist
+    """
+    return _validated_source(filename, int(time.monotonic() // VALIDATION_TTL))
+
+
+@functools.lru_cache(maxsize=8)
+def _downloads_dir(configured: str) -> Path:
+    # Created once per configured directory rather than on every export
+    downloads_dir = Path(configured)
+    downloads_dir.mkdir(parents=True, exist_ok=True)
+    return downloads_dir
+
 
 def get_downloads_dir() -> Path:
     """Get the Downloads directory path and ensure it exists."""
-    downloads_dir = Path("/app/downloads")
-    downloads_dir.mkdir(exist_ok=True)
-    return downloads_dir
+    load_env()
+    return _downloads_dir(os.getenv("ASEPRITE_DOWNLOADS_DIR", "/app/downloads"))
 
 
 def prepare_output_path(output_filename: str, format: str) -> str:
@@ -40,18 +91,18 @@ def prepare_output_path(output_filename: str, format: str) -> str:
     Returns:
         Full path to the output file in Downloads directory
     """
-    downloads_dir = get_downloads_dir()
-    
+    dot = _DOT_SUFFIX[format]
+
     # Extract just the filename if a path was provided
-    output_path = Path(output_filename)
-    filename = output_path.name
-    
-    # Ensure correct extension
-    if not filename.lower().endswith(f".{format}"):
-        filename = f"{output_path.stem}.{format}"
-    
+    filename = os.path.basename(output_filename.rstrip(os.sep))
+
+    # Ensure correct extension; names usually already end in it, in which
+    # case they are used as-is without lowercasing or splitting
+    if not (filename.endswith(dot) or filename.lower().endswith(dot)):
+        filename = os.path.splitext(filename)[0] + dot
+
     # Return full path in Downloads directory
-    return str(downloads_dir / filename)
+    return os.path.join(get_downloads_dir(), filename)
 
 
 @mcp.tool()
@@ -70,16 +121,18 @@ async def export_sprite(
     Returns:
         Status message indicating success or failure
     """
-    try:
-        file_path = AsepriteCommand.validate_file_exists(filename)
-    except AsepriteCommandError as e:
-        return str(e)
-
     # Validate and normalize format
     format = format.lower().strip()
     if format not in SUPPORTED_FORMATS:
-        supported = ", ".join(SUPPORTED_FORMATS.keys())
-        return f"Error: Unsupported format '{format}'. Supported formats: {supported}"
+        return (
+            f"Error: Unsupported format '{format}'. "
+            f"Supported formats: {_SUPPORTED_JOINED}"
+        )
+
+    try:
+        file_path = validate_source(filename)
+    except AsepriteCommandError as e:
+        return str(e)
 
     # Prepare output path in Downloads directory
     output_path = prepare_output_path(output_filename, format)
@@ -88,17 +141,93 @@ async def export_sprite(
     args = ["--batch", str(file_path), "--save-as", output_path]
 
     try:
-        success, output = AsepriteCommand.run_command(args)
+        success, output = await AsepriteCommand.run_command_async(args)
 
         if success:
-            logger.info(f"Exported {filename} to {output_path} as {format.upper()}")
-            return f"Sprite exported successfully from {filename} to Downloads/{Path(output_path).name} ({SUPPORTED_FORMATS[format]})"
+            logger.info("Exported %s to %s as %s", filename, output_path, format)
+            return (
+                f"Sprite exported successfully from {filename} to "
+                f"Downloads/{os.path.basename(output_path)} "
+                f"({SUPPORTED_FORMATS[format]})"
+            )
         else:
-            logger.error(f"Failed to export sprite: {output}")
+            logger.error("Failed to export sprite: %s", output)
             return f"Failed to export sprite: {output}"
 
     except AsepriteCommandError as e:
-        logger.error(f"Aseprite command error: {e}")
+        logger.error("Aseprite command error: %s", e)
+        return f"Error executing Aseprite command: {e}"
+
+
+@mcp.tool()
+async def export_sprite_multi(filename: str, outputs: list[dict[str, str]]) -> str:
+    """Export the Aseprite file to several files with a single Aseprite run.
+    Exported files are automatically placed in the Downloads folder.
+
+    All outputs are saved from the same source sprite, which is only loaded
+    once.
+
+    Args:
+        filename: Name of the Aseprite file to export
+        outputs: List of outputs, each containing:
+            {"output_filename": str, "format": str (optional, default "png")}
+            with the same formats as export_sprite
+
+    Returns:
+        Status message indicating success or failure
+    """
+    if not outputs:
+        return "Error: No outputs provided"
+
+    targets: list[tuple[str, str]] = []
+    for i, spec in enumerate(outputs):
+        if not isinstance(spec, dict):
+            return f"Error: Output {i} is not a dictionary"
+
+        output_filename = spec.get("output_filename")
+        if not output_filename:
+            return f"Error: Output {i} missing required key 'output_filename'"
+
+        format = str(spec.get("format", "png")).lower().strip()
+        if format not in SUPPORTED_FORMATS:
+            return (
+                f"Error: Output {i} has unsupported format '{format}'. "
+                f"Supported formats: {_SUPPORTED_JOINED}"
+            )
+
+        targets.append((prepare_output_path(output_filename, format), format))
+
+    try:
+        file_path = validate_source(filename)
+    except AsepriteCommandError as e:
+        return str(e)
+
+    # Every --save-as applies to the last sprite given on the command line
+    args = ["--batch", str(file_path)]
+    for output_path, _ in targets:
+        args.extend(["--save-as", output_path])
+
+    try:
+        success, output = await AsepriteCommand.run_command_async(args)
+
+        if success:
+            logger.info("Exported %s to %d files", filename, len(targets))
+            lines = [
+                f"Sprite exported successfully from {filename} "
+                f"to {len(targets)} files:"
+            ]
+            lines.extend(
+                f"  Downloads/{os.path.basename(output_path)} "
+                f"({SUPPORTED_FORMATS[format]})"
+                for output_path, format in targets
+            )
+            return "\n".join(lines)
+        else:
+            logger.error("Failed to export sprite: %s", output)
+            return f"Failed to export sprite: {output}"
+
+    except AsepriteCommandError as e:
+        logger.error("Aseprite command error: %s", e)
         return f"Error executing Aseprite command: {e}"
 
 
@@ -121,20 +250,20 @@ async def export_animation(
     Returns:
         Status message indicating success or failure
     """
-    try:
-        file_path = AsepriteCommand.validate_file_exists(filename)
-    except AsepriteCommandError as e:
-        return str(e)
-
     # Validate format for animations
     format = format.lower().strip()
-    if format not in ["gif", "webp"]:
+    if format not in _ANIM_FORMATS:
         return "Error: Animation export only supports 'gif' and 'webp' formats"
 
     # Validate scale
     if scale < 1 or scale > 10:
         return "Error: Scale must be between 1 and 10"
 
+    try:
+        file_path = validate_source(filename)
+    except AsepriteCommandError as e:
+        return str(e)
+
     # Prepare output path in Downloads directory
     output_path = prepare_output_path(output_filename, format)
 
@@ -147,17 +276,22 @@ async def export_animation(
     args.extend(["--save-as", output_path])
 
     try:
-        success, output = AsepriteCommand.run_command(args)
+        success, output = await AsepriteCommand.run_command_async(args)
 
         if success:
-            logger.info(f"Exported animation {filename} to {output_path} as {format.upper()}")
-            return f"Animation exported successfully from {filename} to Downloads/{Path(output_path).name} (scale: {scale}x)"
+            logger.info(
+                "Exported animation %s to %s as %s", filename, output_path, format
+            )
+            return (
+                f"Animation exported successfully from {filename} to "
+                f"Downloads/{os.path.basename(output_path)} (scale: {scale}x)"
+            )
         else:
-            logger.error(f"Failed to export animation: {output}")
+            logger.error("Failed to export animation: %s", output)
             return f"Failed to export animation: {output}"
 
     except AsepriteCommandError as e:
-        logger.error(f"Aseprite command error: {e}")
+        logger.error("Aseprite command error: %s", e)
         return f"Error executing Aseprite command: {e}"
 
 
@@ -181,50 +315,43 @@ async def export_spritesheet(
     Returns:
         Status message indicating success or failure
     """
-    try:
-        file_path = AsepriteCommand.validate_file_exists(filename)
-    except AsepriteCommandError as e:
-        return str(e)
-
     # Validate format
     format = format.lower().strip()
-    if format not in ["png", "jpg", "jpeg", "bmp", "tga"]:
+    if format not in _SHEET_FORMATS:
         return "Error: Sprite sheet export supports: png, jpg, jpeg, bmp, tga"
 
     # Validate sheet type
-    valid_types = ["horizontal", "vertical", "rows", "columns", "packed"]
-    if sheet_type not in valid_types:
-        return f"Error: Invalid sheet type. Valid types: {', '.join(valid_types)}"
+    if sheet_type not in _SHEET_TYPES_SET:
+        return f"Error: Invalid sheet type. Valid types: {_SHEET_TYPES_JOINED}"
+
+    try:
+        file_path = validate_source(filename)
+    except AsepriteCommandError as e:
+        return str(e)
 
     # Prepare output path in Downloads directory
     output_path = prepare_output_path(output_filename, format)
 
-    # Build arguments based on sheet type
-    args = ["--batch", str(file_path)]
-
-    if sheet_type == "horizontal":
-        args.extend(["--sheet-type", "horizontal"])
-    elif sheet_type == "vertical":
-        args.extend(["--sheet-type", "vertical"])
-    elif sheet_type == "rows":
-        args.extend(["--sheet-type", "rows"])
-    elif sheet_type == "columns":
-        args.extend(["--sheet-type", "columns"])
-    elif sheet_type == "packed":
-        args.extend(["--sheet-type", "packed"])
-
-    args.extend(["--save-as", output_path])
+    # Sheet types map one-to-one to Aseprite's --sheet-type values
+    args = [
+        "--batch", str(file_path),
+        "--sheet-type", sheet_type,
+        "--save-as", output_path,
+    ]
 
     try:
-        success, output = AsepriteCommand.run_command(args)
+        success, output = await AsepriteCommand.run_command_async(args)
 
         if success:
-            logger.info(f"Exported sprite sheet {filename} to {output_path}")
-            return f"Sprite sheet exported successfully from {filename} to Downloads/{Path(output_path).name} ({sheet_type} layout)"
+            logger.info("Exported sprite sheet %s to %s", filename, output_path)
+            return (
+                f"Sprite sheet exported successfully from {filename} to "
+                f"Downloads/{os.path.basename(output_path)} ({sheet_type} layout)"
+            )
         else:
-            logger.error(f"Failed to export sprite sheet: {output}")
+            logger.error("Failed to export sprite sheet: %s", output)
             return f"Failed to export sprite sheet: {output}"
 
     except AsepriteCommandError as e:
-        logger.error(f"Aseprite command error: {e}")
+        logger.error("Aseprite command error: %s", e)
         return f"Error executing Aseprite command: {e}"
\ No newline at end of file
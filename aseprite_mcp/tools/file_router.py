@@ -0,0 +1,582 @@
+"""File routing tools for Aseprite MCP.
+
+These tools move finished files (exports, sprites) out of the server's
+working area into user-chosen output directories, with validation of the
+destination beforehand.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import functools
+import itertools
+import logging
+import os
+import shutil
+import stat
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+
+from .. import mcp
+
+logger = logging.getLogger(__name__)
+
+# Default destination for route_file, set with set_default_output_directory
+_default_output_directory: str | None = None
+
+# Successful routes as (time, source, destination, size), oldest first;
+# only the most recent ones are kept
+_recent_routes: deque[tuple[float, str, str, int]] = deque(maxlen=1024)
+
+# Locations files may be routed into, besides the tree the server runs in
+_SAFE_PREFIXES = (
+    os.path.expanduser("~"),
+    "/tmp",
+    "/var/tmp",
+    "C:\\Users",
+    "C:\\temp",
+    "C:\\tmp",
+)
+
+_BYTES_PER_MB = 1 << 20
+
+# Chunk size for the kernel copy calls and buffer size for the fallback copy
+_COPY_BUFSIZE = 1 << 20
+
+# Errors meaning a kernel copy primitive can't handle this pair of files,
+# raised before anything was copied
+_COPY_UNSUPPORTED = frozenset(
+    {
+        errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+        errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF,
+    }
+)
+
+
+# How long directory metadata is reused by validate_output_directory, in seconds
+STAT_TTL = 2
+
+
+@functools.lru_cache(maxsize=256)
+def _dir_stat(path: str, _bucket: int) -> os.stat_result | None:
+    # Missing directories are cached as None too, since clients often poll
+    # the same path; the time bucket in the key makes entries expire
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def _free_bytes(path: str, _bucket: int) -> int:
+    return shutil.disk_usage(path).free
+
+
+def _stat_bucket() -> int:
+    return int(time.monotonic() // STAT_TTL)
+
+
+def _invalidate_stat_cache() -> None:
+    """Forget cached directory metadata after this module changed the disk."""
+    _dir_stat.cache_clear()
+    _free_bytes.cache_clear()
+
+
+def _is_within(path: str, root: str | None) -> bool:
+    """Whether a resolved path is ``root`` or lies below it."""
+    return root is not None and (
+        path == root or path.startswith(os.path.join(root, ""))
+    )
+
+
+def _cwd_grandparent() -> str | None:
+    """The directory two levels above the working directory, if there is one."""
+    try:
+        return str(Path.cwd().resolve().parents[2])
+    except IndexError:
+        return None
+
+
+def _is_allowed_destination(path: str) -> bool:
+    """Whether files may be routed into a resolved directory."""
+    if any(_is_within(path, prefix) for prefix in _SAFE_PREFIXES):
+        return True
+    return _is_within(path, _cwd_grandparent())
+
+
+def _kernel_copy(src_fd: int, dst_fd: int) -> bool:
+    """Copy a whole file between descriptors without passing it through Python.
+
+    Prefers os.copy_file_range, which can clone extents on copy-on-write
+    filesystems, then os.sendfile.
+
+    Returns:
+        True if the file was copied, False if neither primitive is usable
+    """
+    if hasattr(os, "copy_file_range"):
+        copied = 0
+        try:
+            while n := os.copy_file_range(src_fd, dst_fd, _COPY_BUFSIZE):
+                copied += n
+            return True
+        except OSError as e:
+            if copied or e.errno not in _COPY_UNSUPPORTED:
+                raise
+
+    if hasattr(os, "sendfile"):
+        copied = 0
+        try:
+            while n := os.sendfile(dst_fd, src_fd, copied, _COPY_BUFSIZE):
+                copied += n
+            return True
+        except OSError as e:
+            if copied or e.errno not in _COPY_UNSUPPORTED:
+                raise
+
+    return False
+
+
+def _fast_copy(src: str | Path, dst: str | Path, dst_fd: int) -> None:
+    """Copy a file's contents and metadata, like shutil.copy2.
+
+    The contents are copied inside the kernel where possible, falling back
+    to a buffered copy in user space.
+
+    Args:
+        src: File to copy
+        dst: Destination path, used to copy the metadata
+        dst_fd: Descriptor of ``dst`` opened for writing; closed afterwards
+    """
+    with open(dst_fd, "wb") as fdst, open(src, "rb") as fsrc:
+        if not _kernel_copy(fsrc.fileno(), fdst.fileno()):
+            shutil.copyfileobj(fsrc, fdst, _COPY_BUFSIZE)
+    shutil.copystat(src, dst)
+
+
+def _route_file(
+    source_file: str,
+    destination_directory: str | None,
+    filename: str | None,
+    overwrite: bool,
+    create_dirs: bool,
+) -> str:
+    """Copy a file into a directory; see route_file."""
+    destination_directory = destination_directory or _default_output_directory
+    if not destination_directory:
+        return (
+            "Error: No destination directory given "
+            "and no default output directory set"
+        )
+
+    # The name is joined onto the checked directory, so it must not be able
+    # to leave it: no directories, no absolute path, no "." or ".."
+    if filename is not None and (
+        os.path.basename(filename) != filename or filename in ("", ".", "..")
+    ):
+        return (
+            f"Error: Invalid filename: {filename!r}. "
+            "Use a plain file name without directories"
+        )
+
+    try:
+        # Each path is stat'ed once and the result reused for every check
+        source_path = os.path.realpath(source_file)
+        try:
+            source_stat = os.stat(source_path)
+        except FileNotFoundError:
+            return f"Error: Source file not found: {source_file}"
+        if not stat.S_ISREG(source_stat.st_mode):
+            return f"Error: Source path is not a file: {source_file}"
+
+        dest_dir = os.path.realpath(destination_directory)
+
+        # Security check: only route into the user's home, temporary
+        # directories or the tree the server runs in
+        if not _is_allowed_destination(dest_dir):
+            return (
+                "Error: Destination directory is outside the allowed "
+                f"locations: {dest_dir}"
+            )
+
+        try:
+            dest_stat = os.stat(dest_dir)
+        except FileNotFoundError:
+            dest_stat = None
+        if dest_stat is None:
+            if not create_dirs:
+                return f"Error: Destination directory does not exist: {dest_dir}"
+            os.makedirs(dest_dir, exist_ok=True)
+            _invalidate_stat_cache()
+            logger.info("Created directory: %s", dest_dir)
+        elif not stat.S_ISDIR(dest_stat.st_mode):
+            return f"Error: Destination is not a directory: {dest_dir}"
+
+        final_filename = filename or os.path.basename(source_path)
+        dest_file = os.path.join(dest_dir, final_filename)
+
+        # Opening the destination checks both write access and whether it
+        # already exists, without a racy pre-check
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        overwritten = False
+        try:
+            try:
+                dest_fd = os.open(dest_file, flags | os.O_EXCL, 0o644)
+            except FileExistsError:
+                if not overwrite:
+                    return (
+                        f"Error: File already exists: {dest_file}. "
+                        "Use overwrite=True to replace it"
+                    )
+                # Truncating the destination would empty a source routed onto itself
+                if os.path.samestat(source_stat, os.stat(dest_file)):
+                    return (
+                        f"Error: Source and destination are the same file: {dest_file}"
+                    )
+                dest_fd = os.open(dest_file, flags | os.O_TRUNC, 0o644)
+                overwritten = True
+        except PermissionError:
+            return f"Error: No write permission for directory: {dest_dir}"
+
+        _fast_copy(source_path, dest_file, dest_fd)
+        _invalidate_stat_cache()
+        # The copy has the source's size, no need to stat it again
+        file_size = source_stat.st_size
+
+        _recent_routes.append((time.time(), source_path, dest_file, file_size))
+        logger.info("File routed successfully: %s -> %s", source_path, dest_file)
+        return "\n".join((
+            "File routed successfully!",
+            f"Source: {source_path}",
+            f"Destination: {dest_file}",
+            f"Size: {file_size} bytes",
+            f"Status: {'Overwritten' if overwritten else 'Created'}",
+        ))
+
+    except PermissionError as e:
+        logger.error("Permission denied routing %s: %s", source_file, e)
+        return f"Error: Permission denied: {e}"
+    except OSError as e:
+        logger.error("Failed to route %s: %s", source_file, e)
+        return f"Error: File operation failed: {e}"
+
+
+@mcp.tool()
+async def route_file(
+    source_file: str,
+    destination_directory: str | None = None,
+    filename: str | None = None,
+    overwrite: bool = False,
+    create_dirs: bool = True,
+    verify_permissions: bool = True,
+) -> str:
+    """Route a completed file to a user-defined output directory.
+
+    Args:
+        source_file: Path to the file to route
+        destination_directory: Directory to copy the file into (default: the
+                               directory set with set_default_output_directory)
+        filename: Name for the routed file, without directories (default: the
+                  source file name)
+        overwrite: Whether to replace an existing file (default: False)
+        create_dirs: Whether to create a missing destination (default: True)
+        verify_permissions: Deprecated and has no effect; kept so existing
+                            callers don't break. Write access is always
+                            checked by creating the destination file
+
+    Returns:
+        Status message indicating success or failure
+    """
+    return await asyncio.to_thread(
+        _route_file,
+        source_file,
+        destination_directory,
+        filename,
+        overwrite,
+        create_dirs,
+    )
+
+
+@dataclass(slots=True)
+class _ValidationResult:
+    """Findings of validate_output_directory for one directory."""
+
+    path: str
+    exists: bool = False
+    is_directory: bool = False
+    writable: bool = False
+    available_space_mb: float | None = None
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+
+def _validate_output_directory(
+    directory_path: str,
+    create_if_missing: bool,
+    check_write_access: bool,
+    check_space: bool,
+    min_space_mb: int,
+) -> _ValidationResult:
+    """Check a directory; see validate_output_directory."""
+    result = _ValidationResult(path=directory_path)
+
+    try:
+        dir_path = os.path.realpath(directory_path)
+        result.path = dir_path
+        bucket = _stat_bucket()
+
+        dir_stat = _dir_stat(dir_path, bucket)
+        if dir_stat is not None:
+            result.exists = True
+            result.is_directory = stat.S_ISDIR(dir_stat.st_mode)
+            if not result.is_directory:
+                result.errors.append("Path exists but is not a directory")
+        elif create_if_missing:
+            os.makedirs(dir_path, exist_ok=True)
+            _invalidate_stat_cache()
+            logger.info("Created directory: %s", dir_path)
+            result.exists = True
+            result.is_directory = True
+        else:
+            result.errors.append("Directory not found")
+
+        if result.exists and result.is_directory:
+            if check_write_access:
+                result.writable = os.access(dir_path, os.W_OK)
+                if not result.writable:
+                    result.errors.append("No write permission")
+
+            # Without a minimum there is nothing to check, so skip the statvfs
+            if check_space and min_space_mb > 0:
+                available = _free_bytes(dir_path, bucket)
+                min_bytes = min_space_mb * _BYTES_PER_MB
+                available_mb = available / _BYTES_PER_MB
+                result.available_space_mb = available_mb
+                if available < min_bytes:
+                    result.errors.append(
+                        f"Insufficient disk space: {available_mb:.1f} MB available, "
+                        f"{min_space_mb} MB required"
+                    )
+                elif available < min_bytes << 1:
+                    result.warnings.append(
+                        f"Low disk space: {available_mb:.1f} MB available"
+                    )
+
+    except OSError as e:
+        result.errors.append(f"Validation failed: {e}")
+
+    if result.errors:
+        logger.error(
+            "Directory validation failed for %s: %s", directory_path, result.errors
+        )
+    return result
+
+
+def _validation_report(result: _ValidationResult) -> str:
+    status = "INVALID" if result.errors else "VALID"
+    lines = [
+        f"Directory validation: {status}",
+        f"Path: {result.path}",
+        f"Exists: {result.exists}",
+        f"Is directory: {result.is_directory}",
+        f"Writable: {result.writable}",
+    ]
+    if result.available_space_mb is not None:
+        lines.append(f"Available space: {result.available_space_mb:.2f} MB")
+    lines.extend(f"Error: {error}" for error in result.errors)
+    lines.extend(f"Warning: {warning}" for warning in result.warnings)
+    return "\n".join(lines)
+
+
+@mcp.tool()
+async def validate_output_directory(
+    directory_path: str,
+    create_if_missing: bool = False,
+    check_write_access: bool = True,
+    check_space: bool = True,
+    min_space_mb: int = 100,
+) -> str:
+    """Validate that a directory can be used as an output directory.
+
+    Args:
+        directory_path: Directory to validate
+        create_if_missing: Whether to create the directory if it doesn't exist
+        check_write_access: Whether to check for write permission (default: True)
+        check_space: Whether to check the free disk space (default: True)
+        min_space_mb: Minimum free space required in MB; 0 skips the check
+                      (default: 100)
+
+    Returns:
+        Validation report
+    """
+    result = await asyncio.to_thread(
+        _validate_output_directory,
+        directory_path,
+        create_if_missing,
+        check_write_access,
+        check_space,
+        min_space_mb,
+    )
+    return _validation_report(result)
+
+
+@mcp.tool()
+async def set_default_output_directory(directory_path: str) -> str:
+    """Set the directory route_file uses when no destination is given.
+
+    Args:
+        directory_path: Directory to use as the default destination
+
+    Returns:
+        Status message indicating success or failure
+    """
+    global _default_output_directory
+
+    # Uses the validation result directly, including the path it resolved
+    result = await asyncio.to_thread(
+        _validate_output_directory,
+        directory_path,
+        create_if_missing=True,
+        check_write_access=True,
+        check_space=True,
+        min_space_mb=100,
+    )
+    if result.errors:
+        return (
+            f"Error: Cannot use {directory_path} as the default output directory:\n"
+            f"{_validation_report(result)}"
+        )
+
+    _default_output_directory = result.path
+    logger.info("Default output directory set to: %s", _default_output_directory)
+    return f"Default output directory set to: {_default_output_directory}"
+
+
+def _with_parents(layout: tuple[str, ...]) -> tuple[str, ...]:
+    """Expand a layout into all of its directories, parents before children."""
+    directories = {
+        "/".join(parts[:depth])
+        for parts in (dir_path.split("/") for dir_path in layout)
+        for depth in range(1, len(parts) + 1)
+    }
+    return tuple(sorted(directories, key=lambda dir_path: dir_path.count("/")))
+
+
+# Layouts for create_organized_structure, each with the full list of
+# directories to create, parents first, so every directory is made once
+_STRUCTURES: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    name: (layout, _with_parents(layout))
+    for name, layout in {
+        "by_type": (
+            "images/png",
+            "images/gif",
+            "images/other",
+            "sprites/characters",
+            "sprites/items",
+            "exports/animations",
+            "exports/spritesheets",
+            "projects",
+        ),
+        "by_project": (
+            "projects/active",
+            "projects/archived",
+            "assets/sprites",
+            "assets/palettes",
+            "exports",
+        ),
+    }.items()
+}
+
+# The by_date layout, built for the day it was last requested
+_by_date_structure: tuple[date, tuple[tuple[str, ...], tuple[str, ...]]] | None = None
+
+
+def _date_structure() -> tuple[tuple[str, ...], tuple[str, ...]]:
+    global _by_date_structure
+    today = date.today()
+    if _by_date_structure is None or _by_date_structure[0] != today:
+        month = f"{today.year}/{today.month:02d}"
+        layout = (month, f"{month}/exports", f"{month}/sprites")
+        _by_date_structure = (today, (layout, _with_parents(layout)))
+    return _by_date_structure[1]
+
+
+def _create_organized_structure(base_path: str, structure_type: str) -> str:
+    """Create a directory layout; see create_organized_structure."""
+    if structure_type == "by_date":
+        layout, directories = _date_structure()
+    else:
+        try:
+            layout, directories = _STRUCTURES[structure_type]
+        except KeyError:
+            return (
+                "Error: Invalid structure type. "
+                "Valid types: by_type, by_project, by_date"
+            )
+
+    try:
+        base = os.path.realpath(base_path)
+        os.makedirs(base, exist_ok=True)
+
+        for dir_path in directories:
+            full_path = os.path.join(base, dir_path)
+            try:
+                os.mkdir(full_path)
+            except FileExistsError:
+                if not os.path.isdir(full_path):
+                    raise
+    except OSError as e:
+        _invalidate_stat_cache()
+        logger.error("Failed to create directory structure in %s: %s", base_path, e)
+        return f"Error: Failed to create directory structure: {e}"
+
+    _invalidate_stat_cache()
+    logger.info("Created %s structure in %s", structure_type, base)
+    lines = [f"Created {structure_type} structure in {base}:"]
+    lines.extend(f"  {dir_path}" for dir_path in layout)
+    return "\n".join(lines)
+
+
+@mcp.tool()
+async def create_organized_structure(
+    base_path: str, structure_type: str = "by_type"
+) -> str:
+    """Create a directory layout for organizing routed files.
+
+    Args:
+        base_path: Directory to create the structure in
+        structure_type: Layout to create: "by_type" (images, sprites,
+                        exports, projects), "by_project" or "by_date"
+
+    Returns:
+        Status message listing the created directories
+    """
+    return await asyncio.to_thread(
+        _create_organized_structure, base_path, structure_type
+    )
+
+
+@mcp.tool()
+async def list_recent_routes(limit: int = 10) -> str:
+    """List files recently routed with route_file.
+
+    Args:
+        limit: Maximum number of routes to list (default: 10)
+
+    Returns:
+        List of recent routes, newest first
+    """
+    if limit < 1:
+        return "Error: limit must be at least 1"
+    if not _recent_routes:
+        return "No files routed yet"
+
+    routes = list(itertools.islice(reversed(_recent_routes), limit))
+    lines = [f"Recent routes ({len(routes)} of {len(_recent_routes)}):"]
+    for routed_at, source, destination, size in routes:
+        timestamp = datetime.fromtimestamp(routed_at).strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f"  {timestamp} {source} -> {destination} ({size} bytes)")
+    return "\n".join(lines)
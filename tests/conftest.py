@@ -2,7 +2,16 @@
 
 from __future__ import annotations
 
+import struct
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
 import pytest
+from pytest_mock import MockerFixture
+
+from aseprite_mcp.core.commands import AsepriteCommand
 
 
 def pytest_configure(config: pytest.Config) -> None:
@@ -11,25 +20,71 @@ def pytest_configure(config: pytest.Config) -> None:
     config.addinivalue_line("markers", "integration: marks tests as integration tests")
 
 
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    """Run async tests on asyncio only, sharing one backend for the session."""
+    return "asyncio"
+
+
+def _write_header(
+    path: Path,
+    width: int,
+    height: int,
+    frames: int = 1,
+    depth: int = 32,
+    layers: list[int] | None = None,
+) -> Path:
+    """Write an Aseprite file header and a first frame declaring layers.
+
+    Args:
+        layers: Child level of each layer chunk (default: one top-level layer)
+    """
+    header = struct.pack("<IHHHHH", 128, 0xA5E0, frames, width, height, depth)
+    chunks = b"".join(
+        struct.pack("<IHHHH", 12, 0x2004, 0, 0, level) for level in layers or [0]
+    )
+    frame = struct.pack(
+        "<IHHH2xI", 16 + len(chunks), 0xF1FA, 0xFFFF, 100, len(layers or [0])
+    )
+    path.write_bytes(header.ljust(128, b"\0") + frame + chunks)
+    return path
+
+
 @pytest.fixture
-def mock_aseprite_success():
-    """Fixture that mocks successful Aseprite commands."""
-    from unittest.mock import patch
+def write_header() -> Callable[..., Path]:
+    """Writer of minimal Aseprite files, for tests that read a real header."""
+    return _write_header
+
 
-    with patch("aseprite_mcp.core.commands.AsepriteCommand.execute_lua_script") as mock_execute, \
-         patch("aseprite_mcp.core.commands.AsepriteCommand.run_command") as mock_run:
-        mock_execute.return_value = (True, "Success")
-        mock_run.return_value = (True, "Success")
-        yield {"execute": mock_execute, "run": mock_run}
+# Building a mock is comparatively slow, so the tool tests share one of each
+# for the whole session and reset them after every test. Speccing them on the
+# functions they replace keeps the attribute scan to a function's few
+# attributes and rejects typos such as assert_called_once_wiht
+_VALIDATE = Mock(spec_set=AsepriteCommand.validate_file_exists)
+_EXECUTE = AsyncMock(spec_set=AsepriteCommand.execute_lua_script_async)
+_RUN = AsyncMock(spec_set=AsepriteCommand.run_command_async)
 
 
 @pytest.fixture
-def mock_aseprite_failure():
-    """Fixture that mocks failed Aseprite commands."""
-    from unittest.mock import patch
-
-    with patch("aseprite_mcp.core.commands.AsepriteCommand.execute_lua_script") as mock_execute, \
-         patch("aseprite_mcp.core.commands.AsepriteCommand.run_command") as mock_run:
-        mock_execute.return_value = (False, "Command failed")
-        mock_run.return_value = (False, "Command failed")
-        yield {"execute": mock_execute, "run": mock_run}
+def aseprite_mocks(mocker: MockerFixture) -> Iterator[SimpleNamespace]:
+    """Patch the file check and both ways of running Aseprite with shared mocks.
+
+    A tool call runs Aseprite once, so after the test the fixture asserts that
+    Aseprite ran exactly ``runs`` times in total. Tests that stop before running
+    it, or that call several tools, set ``runs`` on the namespace.
+    """
+    _VALIDATE.return_value = "/path/to/file.aseprite"
+    _EXECUTE.return_value = (True, "Success")
+    _RUN.return_value = (True, "Success")
+    mocker.patch.object(AsepriteCommand, "validate_file_exists", _VALIDATE)
+    mocker.patch.object(AsepriteCommand, "execute_lua_script_async", _EXECUTE)
+    mocker.patch.object(AsepriteCommand, "run_command_async", _RUN)
+
+    mocks = SimpleNamespace(validate=_VALIDATE, execute=_EXECUTE, run=_RUN, runs=1)
+    try:
+        yield mocks
+        runs = _EXECUTE.call_count + _RUN.call_count
+        assert runs == mocks.runs, f"Aseprite ran {runs} times, expected {mocks.runs}"
+    finally:
+        for mock in (_VALIDATE, _EXECUTE, _RUN):
+            mock.reset_mock(return_value=True, side_effect=True)
@@ -0,0 +1,167 @@
+"""Tests for batching tools."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+
+from aseprite_mcp.core import batch
+from aseprite_mcp.core.commands import AsepriteCommand
+from aseprite_mcp.tools.batch import begin_batch, draw_batch, flush_batch
+from aseprite_mcp.tools.canvas import add_layer
+from aseprite_mcp.tools.drawing import draw_line, draw_pixels
+
+
+pytestmark = pytest.mark.anyio
+
+# The file the shared validate mock resolves every filename to
+SPRITE = "/path/to/file.aseprite"
+
+
+@pytest.fixture(autouse=True)
+def reset_batch():
+    """Make sure no batch leaks between tests."""
+    batch.take()
+    yield
+    batch.take()
+
+
+class TestBatchTools:
+    """Test cases for batching tools."""
+
+    @pytest.fixture(autouse=True)
+    def mocks(self, aseprite_mocks: SimpleNamespace) -> SimpleNamespace:
+        """Patch Aseprite for every test; tests adjust the shared mocks."""
+        self.mocks = aseprite_mocks
+        return self.mocks
+
+    async def test_begin_and_flush_batch(self) -> None:
+        """Test that queued operations run in a single Aseprite call."""
+        self.mocks.execute.return_value = (True, "Batch applied successfully")
+
+        result = await begin_batch("test.aseprite")
+        assert "Batch opened" in result
+
+        result = await draw_line(SPRITE, 0, 0, 10, 10, "#FF0000")
+        assert result.startswith("Queued line")
+        result = await add_layer(SPRITE, "Outline")
+        assert "2 operations pending" in result
+        self.mocks.execute.assert_not_called()
+
+        result = await flush_batch()
+
+        assert "Batch applied 2 operations" in result
+        assert "1. Draw line from (0,0) to (10,10)" in result
+        assert "2. Add layer 'Outline'" in result
+        script = self.mocks.execute.call_args[0][0]
+        assert script.count("spr:saveAs") == 1
+        assert script.count("app.transaction") == 1
+
+    async def test_queue_pixels_reports_pixel_count(self) -> None:
+        """Test that queued pixels report the pixels drawn and the ops pending."""
+        self.mocks.runs = 0
+        await begin_batch("test.aseprite")
+
+        pixels = [{"x": x, "y": 0, "color": "#FF0000"} for x in range(50)]
+        result = await draw_pixels(SPRITE, pixels)
+
+        assert result == f"Queued 50 pixels for {SPRITE} (1 operations pending)"
+
+    async def test_queue_without_autosave(self, mocker: MockerFixture) -> None:
+        """Test that autosave=False is accepted for queued operations."""
+        self.mocks.runs = 0
+        mocker.patch.object(AsepriteCommand, "uses_daemon", return_value=False)
+        await begin_batch("test.aseprite")
+
+        pixels = [{"x": 0, "y": 0, "color": "#FF0000"}]
+        result = await draw_pixels(SPRITE, pixels, autosave=False)
+        assert result.startswith("Queued 1 pixels")
+        result = await add_layer(SPRITE, "Outline", autosave=False)
+        assert "2 operations pending" in result
+
+    async def test_flush_batch_operation_error(self) -> None:
+        """Test that an error returned by one operation fails the whole batch."""
+        # Aseprite reports the Lua error raised for the failing operation
+        self.mocks.execute.return_value = (False, "Error: Could not create cel")
+
+        await begin_batch("test.aseprite")
+        await draw_line(SPRITE, 0, 0, 10, 10, "#FF0000")
+        result = await flush_batch()
+
+        assert result == "Failed to apply batch: Error: Could not create cel"
+        script = self.mocks.execute.call_args[0][0]
+        assert "local err = op()" in script
+        assert "error(err, 0)" in script
+
+    async def test_flush_batch_not_open(self) -> None:
+        """Test flushing without an open batch."""
+        self.mocks.runs = 0
+        result = await flush_batch()
+        assert "Error: No batch is open" in result
+
+    async def test_begin_batch_twice(self) -> None:
+        """Test that only one batch can be open at a time."""
+        self.mocks.runs = 0
+        await begin_batch("test.aseprite")
+        result = await begin_batch("test.aseprite")
+
+        assert "already open" in result
+
+    async def test_draw_batch_success(self) -> None:
+        """Test applying a list of operations in one call."""
+        self.mocks.execute.return_value = (True, "Batch applied successfully")
+
+        result = await draw_batch(
+            "test.aseprite",
+            [
+                {"tool": "add_frame", "description": "Second frame"},
+                {"tool": "fill_area", "args": {"x": 1, "y": 2, "color": "#00FF00"}},
+                {
+                    "tool": "draw_circle",
+                    "args": {"center_x": 5, "center_y": 5, "radius": 3},
+                },
+            ],
+        )
+
+        assert "Batch applied 3 operations" in result
+        assert "1. Second frame" in result
+        assert "2. Fill area at (1,2)" in result
+
+    async def test_draw_batch_unsupported_tool(self) -> None:
+        """Test draw_batch with an unknown tool."""
+        self.mocks.runs = 0
+        result = await draw_batch("test.aseprite", [{"tool": "export_sprite"}])
+        assert "unsupported tool 'export_sprite'" in result
+
+    async def test_draw_batch_invalid_operation(self) -> None:
+        """Test that an invalid operation discards the whole batch."""
+        self.mocks.runs = 0
+        line = {"x1": 0, "y1": 0, "x2": 1, "y2": 1, "color": "bad"}
+
+        result = await draw_batch(
+            "test.aseprite",
+            [{"tool": "add_frame"}, {"tool": "draw_line", "args": line}],
+        )
+
+        assert "Operation 1 (draw_line) failed" in result
+        assert "Invalid color format" in result
+        assert not batch.is_open(SPRITE)
+
+    async def test_draw_batch_operation_raises(self) -> None:
+        """Test that an operation raising an exception closes the batch."""
+        self.mocks.runs = 0
+
+        result = await draw_batch(
+            "test.aseprite",
+            [
+                {"tool": "add_frame"},
+                # A layer name that isn't a string raises AttributeError
+                {"tool": "modify_sprite", "args": {"add_layers": [1]}},
+            ],
+        )
+
+        assert "Operation 1 (modify_sprite) failed" in result
+        assert not batch.is_open(SPRITE)
+        assert "Batch opened" in await begin_batch("test.aseprite")
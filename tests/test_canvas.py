@@ -2,131 +2,195 @@
 
 from __future__ import annotations
 
-import tempfile
-from unittest.mock import AsyncMock, patch
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
+from pytest_mock import MockerFixture
 
-from aseprite_mcp.core.commands import AsepriteCommandError
-from aseprite_mcp.tools.canvas import add_frame, add_layer, create_canvas, get_canvas_info
+from aseprite_mcp.core.commands import AsepriteCommand, AsepriteCommandError
+from aseprite_mcp.tools.canvas import (
+    add_frame,
+    add_layer,
+    create_canvas,
+    get_canvas_info,
+    modify_sprite,
+    save_file,
+)
+
+
+pytestmark = pytest.mark.anyio
 
 
 class TestCanvasTools:
     """Test cases for canvas management tools."""
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.execute_lua_script")
-    async def test_create_canvas_success(self, mock_execute: AsyncMock) -> None:
+    @pytest.fixture(autouse=True)
+    def mocks(self, aseprite_mocks: SimpleNamespace) -> SimpleNamespace:
+        """Patch Aseprite for every test; tests adjust the shared mocks."""
+        self.mocks = aseprite_mocks
+        return self.mocks
+
+    async def test_create_canvas_success(self) -> None:
         """Test successful canvas creation."""
-        mock_execute.return_value = (True, "Canvas created successfully")
+        self.mocks.execute.return_value = (True, "Canvas created successfully")
 
         result = await create_canvas(800, 600, "test.aseprite")
 
         assert "Canvas created successfully" in result
         assert "800x600" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_create_canvas_invalid_dimensions(self) -> None:
         """Test canvas creation with invalid dimensions."""
+        self.mocks.runs = 0
         result = await create_canvas(0, 600, "test.aseprite")
         assert "Error: Width and height must be positive" in result
 
         result = await create_canvas(800, -100, "test.aseprite")
         assert "Error: Width and height must be positive" in result
 
-    @pytest.mark.asyncio
     async def test_create_canvas_too_large(self) -> None:
         """Test canvas creation with dimensions too large."""
+        self.mocks.runs = 0
         result = await create_canvas(10000, 600, "test.aseprite")
         assert "Error: Canvas dimensions too large" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.execute_lua_script")
-    async def test_create_canvas_command_failure(self, mock_execute: AsyncMock) -> None:
+    async def test_create_canvas_command_failure(self) -> None:
         """Test canvas creation with command failure."""
-        mock_execute.return_value = (False, "Command failed")
+        self.mocks.execute.return_value = (False, "Command failed")
 
         result = await create_canvas(800, 600, "test.aseprite")
 
         assert "Failed to create canvas" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.execute_lua_script")
-    async def test_add_layer_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_add_layer_success(self) -> None:
         """Test successful layer addition."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Layer added successfully")
+        self.mocks.execute.return_value = (True, "Layer added successfully")
 
         result = await add_layer("test.aseprite", "new_layer")
 
         assert "Layer 'new_layer' added successfully" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
+    async def test_add_layer_escapes_name(self) -> None:
+        """Test that quotes, backslashes and newlines in layer names are escaped."""
+        self.mocks.execute.return_value = (True, "Layer added successfully")
+
+        await add_layer("test.aseprite", 'say "hi"\\\nnow')
+
+        script = self.mocks.execute.call_args[0][0]
+        assert 'ipairs({"say \\"hi\\"\\\\\\nnow"})' in script
+
     async def test_add_layer_empty_name(self) -> None:
         """Test layer addition with empty name."""
+        self.mocks.runs = 0
         result = await add_layer("test.aseprite", "")
         assert "Error: Layer name cannot be empty" in result
 
         result = await add_layer("test.aseprite", "   ")
         assert "Error: Layer name cannot be empty" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.validate_file_exists")
-    async def test_add_layer_file_not_found(self, mock_validate: AsyncMock) -> None:
+    async def test_add_layer_file_not_found(self) -> None:
         """Test layer addition with non-existing file."""
-        mock_validate.side_effect = AsepriteCommandError("File not found")
+        self.mocks.runs = 0
+        self.mocks.validate.side_effect = AsepriteCommandError("File not found")
 
         result = await add_layer("nonexistent.aseprite", "new_layer")
 
         assert "File not found" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.execute_lua_script")
-    async def test_add_frame_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_add_frame_success(self) -> None:
         """Test successful frame addition."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Frame added successfully")
+        self.mocks.execute.return_value = (True, "Frame added successfully")
 
         result = await add_frame("test.aseprite")
 
         assert "New frame added successfully" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.execute_lua_script")
-    async def test_get_canvas_info_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
+    async def test_add_frame_without_autosave(self, mocker: MockerFixture) -> None:
+        """Test that autosave=False omits the save when sprites stay open."""
+        self.mocks.execute.return_value = (True, "Frame added successfully")
+
+        mocker.patch.object(AsepriteCommand, "uses_daemon", return_value=True)
+
+        result = await add_frame("test.aseprite", autosave=False)
+
+        assert "New frame added successfully" in result
+        assert "saveAs" not in self.mocks.execute.call_args[0][0]
+
+    async def test_add_frame_without_autosave_requires_daemon(
+        self, mocker: MockerFixture
     ) -> None:
+        """Test that autosave=False is refused when the edit would be lost."""
+        self.mocks.runs = 0
+        mocker.patch.object(AsepriteCommand, "uses_daemon", return_value=False)
+
+        result = await add_frame("test.aseprite", autosave=False)
+
+        assert "requires ASEPRITE_DAEMON" in result
+
+    async def test_modify_sprite_success(self) -> None:
+        """Test adding layers and frames in a single Aseprite run."""
+        self.mocks.execute.return_value = (True, "Sprite modified successfully")
+
+        result = await modify_sprite(
+            "test.aseprite", add_layers=["Background", "Outline"], add_frames=3
+        )
+
+        assert "Added 2 layers and 3 frames successfully" in result
+        script = self.mocks.execute.call_args[0][0]
+        assert 'ipairs({"Background","Outline"})' in script
+        assert "for i = 1, 3 do" in script
+        assert script.count("spr:saveAs") == 1
+
+    async def test_modify_sprite_invalid(self) -> None:
+        """Test modify_sprite argument validation."""
+        self.mocks.runs = 0
+        result = await modify_sprite("test.aseprite")
+        assert "Error: No layers or frames to add" in result
+
+        result = await modify_sprite("test.aseprite", add_layers=["ok", " "])
+        assert "Error: Layer name cannot be empty" in result
+
+        result = await modify_sprite("test.aseprite", add_frames=-1)
+        assert "between 0 and 1000" in result
+
+    async def test_save_file_success(self) -> None:
+        """Test saving a file."""
+        self.mocks.execute.return_value = (True, "File saved successfully")
+
+        result = await save_file("test.aseprite")
+
+        assert "File saved successfully" in result
+        assert "spr:saveAs(spr.filename)" in self.mocks.execute.call_args[0][0]
+
+    async def test_get_canvas_info_from_file(
+        self, tmp_path: Path, write_header: Callable[..., Path]
+    ) -> None:
+        """Test that canvas info is read from the file without running Aseprite."""
+        self.mocks.runs = 0
+        path = write_header(tmp_path / "test.aseprite", 64, 32, frames=4, layers=[0, 0])
+        self.mocks.validate.return_value = str(path)
+
+        result = await get_canvas_info(str(path))
+
+        assert result == "Canvas: 64x32, Layers: 2, Frames: 4, Color Mode: 0"
+
+    async def test_get_canvas_info_success(self) -> None:
         """Test successful canvas info retrieval."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Canvas: 800x600, Layers: 2, Frames: 3")
+        self.mocks.execute.return_value = (
+            True, "Canvas: 800x600, Layers: 2, Frames: 3"
+        )
 
         result = await get_canvas_info("test.aseprite")
 
         assert "Canvas: 800x600" in result
         assert "Layers: 2" in result
         assert "Frames: 3" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.canvas.AsepriteCommand.execute_lua_script")
-    async def test_canvas_command_error_handling(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_canvas_command_error_handling(self) -> None:
         """Test error handling for canvas operations."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.side_effect = AsepriteCommandError("Aseprite not found")
+        self.mocks.execute.side_effect = AsepriteCommandError("Aseprite not found")
 
         result = await add_layer("test.aseprite", "test_layer")
 
@@ -3,13 +3,15 @@
 from __future__ import annotations
 
 import os
-import tempfile
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from aseprite_mcp.core.commands import AsepriteCommand, AsepriteCommandError
+from aseprite_mcp.core.commands import AsepriteCommand, AsepriteCommandError, load_env
+
+
+pytestmark = pytest.mark.anyio
 
 
 class TestAsepriteCommand:
@@ -28,10 +30,34 @@ class TestAsepriteCommand:
             path = AsepriteCommand.get_aseprite_path()
             assert path == test_path
 
+    @patch("dotenv.load_dotenv")
+    def test_get_aseprite_path_loads_env_once(self, mock_load: Mock) -> None:
+        """Test that the .env file is loaded on first use, not on every call."""
+        load_env.cache_clear()
+        try:
+            AsepriteCommand.get_aseprite_path()
+            AsepriteCommand.get_aseprite_path()
+        finally:
+            load_env.cache_clear()
+
+        mock_load.assert_called_once()
+
+    def test_get_aseprite_path_resolves_from_path(self, tmp_path: Path) -> None:
+        """Test that a bare executable name is resolved to an absolute path."""
+        executable = tmp_path / "aseprite-test"
+        executable.write_text("#!/bin/sh\n")
+        executable.chmod(0o755)
+
+        env = {"ASEPRITE_PATH": "aseprite-test", "PATH": str(tmp_path)}
+        with patch.dict(os.environ, env):
+            path = AsepriteCommand.get_aseprite_path()
+
+        assert path == str(executable)
+
     @patch("subprocess.run")
     def test_run_command_success(self, mock_run: Mock) -> None:
         """Test successful command execution."""
-        mock_run.return_value.stdout = "success output"
+        mock_run.return_value.stdout = b"success output"
         mock_run.return_value.returncode = 0
 
         success, output = AsepriteCommand.run_command(["--version"])
@@ -45,7 +71,9 @@ class TestAsepriteCommand:
         """Test failed command execution."""
         from subprocess import CalledProcessError
 
-        mock_run.side_effect = CalledProcessError(1, ["aseprite"], stderr="error message")
+        mock_run.side_effect = CalledProcessError(
+            1, ["aseprite"], stderr=b"error message"
+        )
 
         success, output = AsepriteCommand.run_command(["--invalid"])
 
@@ -70,6 +98,41 @@ class TestAsepriteCommand:
         with pytest.raises(AsepriteCommandError, match="executable not found"):
             AsepriteCommand.run_command(["--version"])
 
+    @patch("asyncio.create_subprocess_exec")
+    async def test_run_command_async_success(self, mock_exec: AsyncMock) -> None:
+        """Test successful asynchronous command execution."""
+        mock_exec.return_value.communicate = AsyncMock(
+            return_value=(b"success output", b"")
+        )
+        mock_exec.return_value.returncode = 0
+
+        success, output = await AsepriteCommand.run_command_async(["--version"])
+
+        assert success is True
+        assert output == "success output"
+        mock_exec.assert_called_once()
+
+    @patch("asyncio.create_subprocess_exec")
+    async def test_run_command_async_failure(self, mock_exec: AsyncMock) -> None:
+        """Test failed asynchronous command execution."""
+        mock_exec.return_value.communicate = AsyncMock(
+            return_value=(b"", b"error message")
+        )
+        mock_exec.return_value.returncode = 1
+
+        success, output = await AsepriteCommand.run_command_async(["--invalid"])
+
+        assert success is False
+        assert output == "error message"
+
+    @patch("asyncio.create_subprocess_exec")
+    async def test_run_command_async_file_not_found(self, mock_exec: AsyncMock) -> None:
+        """Test asynchronous command with missing executable."""
+        mock_exec.side_effect = FileNotFoundError()
+
+        with pytest.raises(AsepriteCommandError, match="executable not found"):
+            await AsepriteCommand.run_command_async(["--version"])
+
     @patch.object(AsepriteCommand, "run_command")
     def test_execute_lua_script_success(self, mock_run: Mock) -> None:
         """Test successful Lua script execution."""
@@ -88,35 +151,57 @@ class TestAsepriteCommand:
             AsepriteCommand.execute_lua_script("")
 
     @patch.object(AsepriteCommand, "run_command")
-    def test_execute_lua_script_with_file(self, mock_run: Mock) -> None:
+    def test_execute_lua_script_with_file(self, mock_run: Mock, tmp_path: Path) -> None:
         """Test Lua script execution with file."""
         mock_run.return_value = (True, "script output")
+        sprite = tmp_path / "test.aseprite"
+        sprite.touch()
 
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix=".aseprite", delete=False) as tmp:
-            tmp_path = tmp.name
+        script = "print('hello')"
+        success, output = AsepriteCommand.execute_lua_script(script, str(sprite))
 
-        try:
-            script = "print('hello')"
-            success, output = AsepriteCommand.execute_lua_script(script, tmp_path)
+        assert success is True
+        assert output == "script output"
+        mock_run.assert_called_once()
 
-            assert success is True
-            assert output == "script output"
-            mock_run.assert_called_once()
+        # Check that the file path was included in the arguments
+        call_args = mock_run.call_args[0][0]
+        assert str(sprite) in call_args
 
-            # Check that the file path was included in the arguments
-            call_args = mock_run.call_args[0][0]
-            assert tmp_path in call_args
+    @patch.object(AsepriteCommand, "run_command")
+    def test_execute_lua_script_reuses_scratch_file(self, mock_run: Mock) -> None:
+        """Test that sequential scripts reuse the same scratch file."""
+        mock_run.return_value = (True, "script output")
 
-        finally:
-            os.unlink(tmp_path)
+        AsepriteCommand.execute_lua_script("print('one')")
+        AsepriteCommand.execute_lua_script("print('two')")
+
+        first, second = (c[0][0][-1] for c in mock_run.call_args_list)
+        assert first == second
+        assert Path(first).read_text(encoding="utf-8") == "print('two')"
+
+    @patch.object(AsepriteCommand, "run_command_async")
+    async def test_execute_lua_script_async(self, mock_run: AsyncMock) -> None:
+        """Test asynchronous Lua script execution."""
+        mock_run.return_value = (True, "script output")
+
+        success, output = await AsepriteCommand.execute_lua_script_async(
+            "print('hello')"
+        )
 
-    def test_validate_file_exists_success(self) -> None:
+        assert success is True
+        assert output == "script output"
+        call_args = mock_run.call_args[0][0]
+        assert call_args[0] == "--batch"
+        assert "--script" in call_args
+
+    def test_validate_file_exists_success(self, tmp_path: Path) -> None:
         """Test file validation with existing file."""
-        with tempfile.NamedTemporaryFile() as tmp:
-            result = AsepriteCommand.validate_file_exists(tmp.name)
-            assert isinstance(result, Path)
-            assert result.exists()
+        sprite = tmp_path / "test.aseprite"
+        sprite.touch()
+
+        result = AsepriteCommand.validate_file_exists(str(sprite))
+        assert result == str(sprite)
 
     def test_validate_file_exists_failure(self) -> None:
         """Test file validation with non-existing file."""
@@ -0,0 +1,118 @@
+"""Tests for the persistent Aseprite daemon."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from aseprite_mcp.core.commands import AsepriteCommandError
+from aseprite_mcp.core.daemon import AsepriteDaemon, _unescape, get_daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requires os.mkfifo")
+
+# Stand-in for Aseprite running the dispatcher: answers every request with the
+# sprite and script it was asked to run.
+FAKE_ASEPRITE = f"""#!{sys.executable}
+import sys
+params = dict(a.split("=", 1) for a in sys.argv if "=" in a)
+with open(params["requests"]) as requests, open(params["responses"], "w") as responses:
+    for line in requests:
+        line = line.rstrip("\\n")
+        if line == "EXIT":
+            break
+        token, reload, filename, script = line.split("\\t")
+        status = "ERR" if script.endswith("fail.lua") else "OK"
+        output = f"opened {{filename}} reload={{reload}}\\\\nran {{script}}"
+        responses.write(f"{{token}}\\t{{status}}\\t{{output}}\\n")
+        responses.flush()
+"""
+
+
+@pytest.fixture
+def fake_aseprite(tmp_path: Path) -> str:
+    """Write an executable fake Aseprite and return its path."""
+    path = tmp_path / "aseprite"
+    path.write_text(FAKE_ASEPRITE)
+    path.chmod(0o755)
+    return str(path)
+
+
+class TestAsepriteDaemon:
+    """Test cases for AsepriteDaemon."""
+
+    @pytest.mark.parametrize("output", ["C:\\new\\dir\nnext", "\\\\n", "a\\\nb", ""])
+    def test_unescape_reverses_dispatcher_escape(self, output: str) -> None:
+        """Test that backslashes and newlines survive the response line."""
+        # Same escaping as escape() in the dispatcher: backslashes, then newlines
+        escaped = output.replace("\\", "\\\\").replace("\n", "\\n")
+
+        assert "\n" not in escaped
+        assert _unescape(escaped) == output
+
+    def test_run_script_reuses_process(self, fake_aseprite: str) -> None:
+        """Test that consecutive scripts are served by the same process."""
+        daemon = AsepriteDaemon(fake_aseprite)
+        try:
+            success, output = daemon.run_script(
+                "/tmp/a.lua", "sprite.aseprite", timeout=10
+            )
+            pid = daemon._proc.pid
+
+            assert success is True
+            assert output == "opened sprite.aseprite reload=0\nran /tmp/a.lua"
+
+            success, output = daemon.run_script("/tmp/fail.lua", timeout=10)
+            assert success is False
+            assert daemon._proc.pid == pid
+        finally:
+            daemon.stop()
+
+        assert not daemon.running
+
+    def test_run_script_reloads_changed_file(
+        self, fake_aseprite: str, tmp_path: Path
+    ) -> None:
+        """Test that a sprite changed on disk is reopened by the dispatcher."""
+        sprite = tmp_path / "sprite.aseprite"
+        sprite.write_bytes(b"v1")
+
+        daemon = AsepriteDaemon(fake_aseprite)
+        try:
+            _, output = daemon.run_script("/tmp/a.lua", sprite, timeout=10)
+            assert "reload=0" in output
+            _, output = daemon.run_script("/tmp/a.lua", sprite, timeout=10)
+            assert "reload=0" in output
+
+            os.utime(sprite, ns=(0, 0))
+            _, output = daemon.run_script("/tmp/a.lua", sprite, timeout=10)
+            assert "reload=1" in output
+        finally:
+            daemon.stop()
+
+    def test_run_script_timeout(self, tmp_path: Path) -> None:
+        """Test that a dispatcher that never answers times out."""
+        silent = tmp_path / "silent"
+        silent.write_text(f"#!{sys.executable}\nimport time\ntime.sleep(30)\n")
+        silent.chmod(0o755)
+
+        daemon = AsepriteDaemon(str(silent))
+        with pytest.raises(AsepriteCommandError, match="timed out"):
+            daemon.run_script("/tmp/a.lua", timeout=1)
+
+        assert not daemon.running
+
+    def test_get_daemon_disabled_by_default(self) -> None:
+        """Test that daemon mode is opt-in."""
+        with patch.dict(os.environ, {}, clear=True):
+            assert get_daemon("aseprite") is None
+
+    def test_get_daemon_enabled(self) -> None:
+        """Test that the daemon is shared between calls."""
+        with patch.dict(os.environ, {"ASEPRITE_DAEMON": "1"}):
+            daemon = get_daemon("aseprite")
+            assert daemon is not None
+            assert get_daemon("aseprite") is daemon
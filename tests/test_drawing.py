@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, patch
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
@@ -18,43 +20,69 @@ from aseprite_mcp.tools.drawing import (
 )
 
 
+pytestmark = pytest.mark.anyio
+
+# Valid arguments, after the filename, for a call of each drawing tool
+DRAWING_CALLS = [
+    (draw_pixels, ([{"x": 0, "y": 0, "color": "#FF0000"}],)),
+    (draw_line, (0, 0, 100, 100)),
+    (draw_rectangle, (0, 0, 10, 10)),
+    (fill_area, (5, 5)),
+    (draw_circle, (50, 50, 10)),
+]
+
+
 class TestDrawingHelpers:
     """Test cases for drawing helper functions."""
 
-    def test_validate_hex_color_valid(self) -> None:
+    @pytest.mark.parametrize(
+        ("color", "normalized"),
+        [("#FF0000", "FF0000"), ("ff0000", "FF0000"), ("123ABC", "123ABC")],
+    )
+    def test_validate_hex_color_valid(self, color: str, normalized: str) -> None:
         """Test hex color validation with valid colors."""
-        assert validate_hex_color("#FF0000") == (True, "FF0000")
-        assert validate_hex_color("ff0000") == (True, "FF0000")
-        assert validate_hex_color("123ABC") == (True, "123ABC")
-
-    def test_validate_hex_color_invalid(self) -> None:
+        assert validate_hex_color(color) == (True, normalized)
+
+    @pytest.mark.parametrize(
+        "color",
+        [
+            "FF00",  # Too short
+            "FF00000",  # Too long
+            "GGHHII",  # Invalid characters
+            "red",  # Not hex
+        ],
+    )
+    def test_validate_hex_color_invalid(self, color: str) -> None:
         """Test hex color validation with invalid colors."""
-        assert validate_hex_color("FF00")[0] is False  # Too short
-        assert validate_hex_color("FF00000")[0] is False  # Too long
-        assert validate_hex_color("GGHHII")[0] is False  # Invalid characters
-        assert validate_hex_color("red")[0] is False  # Not hex
-
-    def test_hex_to_rgb(self) -> None:
+        assert validate_hex_color(color)[0] is False
+
+    @pytest.mark.parametrize(
+        ("color", "rgb"),
+        [
+            ("FF0000", (255, 0, 0)),
+            ("00FF00", (0, 255, 0)),
+            ("0000FF", (0, 0, 255)),
+            ("FFFFFF", (255, 255, 255)),
+            ("000000", (0, 0, 0)),
+        ],
+    )
+    def test_hex_to_rgb(self, color: str, rgb: tuple[int, int, int]) -> None:
         """Test hex to RGB conversion."""
-        assert hex_to_rgb("FF0000") == (255, 0, 0)
-        assert hex_to_rgb("00FF00") == (0, 255, 0)
-        assert hex_to_rgb("0000FF") == (0, 0, 255)
-        assert hex_to_rgb("FFFFFF") == (255, 255, 255)
-        assert hex_to_rgb("000000") == (0, 0, 0)
+        assert hex_to_rgb(color) == rgb
 
 
 class TestDrawingTools:
     """Test cases for drawing tools."""
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.execute_lua_script")
-    async def test_draw_pixels_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    @pytest.fixture(autouse=True)
+    def mocks(self, aseprite_mocks: SimpleNamespace) -> SimpleNamespace:
+        """Patch Aseprite for every test; tests adjust the shared mocks."""
+        self.mocks = aseprite_mocks
+        return self.mocks
+
+    async def test_draw_pixels_success(self) -> None:
         """Test successful pixel drawing."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Pixels drawn successfully")
+        self.mocks.execute.return_value = (True, "Pixels drawn successfully")
 
         pixels = [
             {"x": 10, "y": 20, "color": "#FF0000"},
@@ -64,148 +92,140 @@ class TestDrawingTools:
         result = await draw_pixels("test.aseprite", pixels)
 
         assert "Successfully drew 2 pixels" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
+        # Pixels are emitted as one flat table in Aseprite's RGBA layout
+        script = self.mocks.execute.call_args[0][0]
+        assert "{10,20,4278190335,30,40,4278255360}" in script
+
+    async def test_draw_pixels_outside_canvas(
+        self, tmp_path: Path, write_header: Callable[..., Path]
+    ) -> None:
+        """Test that pixels outside the canvas are dropped before scripting."""
+        path = write_header(tmp_path / "test.aseprite", 16, 16)
+        self.mocks.validate.return_value = str(path)
+        self.mocks.execute.return_value = (True, "Pixels drawn successfully")
+
+        pixels = [
+            {"x": 1, "y": 2, "color": "#FF0000"},
+            {"x": 16, "y": 0, "color": "#FF0000"},
+        ]
+
+        result = await draw_pixels(str(path), pixels)
+
+        assert "Successfully drew 1 pixels" in result
+        assert "1 outside the canvas skipped" in result
+        script = self.mocks.execute.call_args[0][0]
+        assert "{1,2,4278190335}" in script
+
+        result = await draw_pixels(str(path), [{"x": 20, "y": 20, "color": "#FF0000"}])
+        assert "outside the 16x16 canvas" in result
+
     async def test_draw_pixels_empty_list(self) -> None:
         """Test pixel drawing with empty list."""
+        self.mocks.runs = 0
         result = await draw_pixels("test.aseprite", [])
         assert "Error: No pixels provided" in result
 
-    @pytest.mark.asyncio
-    async def test_draw_pixels_invalid_data(self) -> None:
+    @pytest.mark.parametrize(
+        ("pixels", "expected"),
+        [
+            (["invalid"], "Pixel 0 is not a dictionary"),
+            ([{"x": 10}], "missing required key"),
+            (
+                [{"x": -1, "y": 0, "color": "#FF0000"}],
+                "coordinates must be non-negative",
+            ),
+            ([{"x": 0, "y": 0, "color": "invalid"}], "invalid color format"),
+        ],
+    )
+    async def test_draw_pixels_invalid_data(self, pixels: list, expected: str) -> None:
         """Test pixel drawing with invalid pixel data."""
-        # Invalid pixel data structure
-        result = await draw_pixels("test.aseprite", ["invalid"])
-        assert "Pixel 0 is not a dictionary" in result
-
-        # Missing required keys
-        result = await draw_pixels("test.aseprite", [{"x": 10}])
-        assert "missing required key" in result
-
-        # Invalid coordinates
-        result = await draw_pixels("test.aseprite", [{"x": -1, "y": 0, "color": "#FF0000"}])
-        assert "coordinates must be non-negative" in result
-
-        # Invalid color
-        result = await draw_pixels("test.aseprite", [{"x": 0, "y": 0, "color": "invalid"}])
-        assert "invalid color format" in result
-
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.execute_lua_script")
-    async def test_draw_line_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+        self.mocks.runs = 0
+        result = await draw_pixels("test.aseprite", pixels)
+        assert expected in result
+
+    async def test_draw_line_success(self) -> None:
         """Test successful line drawing."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Line drawn successfully")
+        self.mocks.execute.return_value = (True, "Line drawn successfully")
 
         result = await draw_line("test.aseprite", 0, 0, 100, 100, "#FF0000", 2)
 
         assert "Line drawn successfully" in result
         assert "from (0,0) to (100,100)" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_draw_line_invalid_thickness(self) -> None:
         """Test line drawing with invalid thickness."""
+        self.mocks.runs = 0
         result = await draw_line("test.aseprite", 0, 0, 100, 100, "#FF0000", 0)
         assert "Error: Thickness must be between 1 and 100" in result
 
         result = await draw_line("test.aseprite", 0, 0, 100, 100, "#FF0000", 101)
         assert "Error: Thickness must be between 1 and 100" in result
 
-    @pytest.mark.asyncio
     async def test_draw_line_invalid_color(self) -> None:
         """Test line drawing with invalid color."""
+        self.mocks.runs = 0
         result = await draw_line("test.aseprite", 0, 0, 100, 100, "invalid")
         assert "Error: Invalid color format" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.execute_lua_script")
-    async def test_draw_rectangle_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_draw_rectangle_success(self) -> None:
         """Test successful rectangle drawing."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Rectangle drawn successfully")
+        self.mocks.execute.return_value = (True, "Rectangle drawn successfully")
 
         result = await draw_rectangle("test.aseprite", 10, 20, 100, 50, "#0000FF", True)
 
         assert "Filled Rectangle drawn successfully" in result
         assert "at (10,20) size 100x50" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_draw_rectangle_invalid_dimensions(self) -> None:
         """Test rectangle drawing with invalid dimensions."""
+        self.mocks.runs = 0
         result = await draw_rectangle("test.aseprite", 0, 0, 0, 100)
         assert "Error: Width and height must be positive" in result
 
         result = await draw_rectangle("test.aseprite", 0, 0, 100, -50)
         assert "Error: Width and height must be positive" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.execute_lua_script")
-    async def test_fill_area_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_fill_area_success(self) -> None:
         """Test successful area filling."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Area filled successfully")
+        self.mocks.execute.return_value = (True, "Area filled successfully")
 
         result = await fill_area("test.aseprite", 50, 75, "#FFFF00")
 
         assert "Area filled successfully" in result
         assert "at (50,75)" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.execute_lua_script")
-    async def test_draw_circle_success(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_draw_circle_success(self) -> None:
         """Test successful circle drawing."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.return_value = (True, "Circle drawn successfully")
+        self.mocks.execute.return_value = (True, "Circle drawn successfully")
 
         result = await draw_circle("test.aseprite", 100, 100, 50, "#FF00FF", False)
 
         assert "Circle drawn successfully" in result
         assert "at (100,100) radius 50" in result
-        mock_execute.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_draw_circle_invalid_radius(self) -> None:
         """Test circle drawing with invalid radius."""
+        self.mocks.runs = 0
         result = await draw_circle("test.aseprite", 100, 100, 0)
         assert "Error: Radius must be positive" in result
 
         result = await draw_circle("test.aseprite", 100, 100, -10)
         assert "Error: Radius must be positive" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    async def test_drawing_file_not_found(self, mock_validate: AsyncMock) -> None:
+    @pytest.mark.parametrize(("tool", "args"), DRAWING_CALLS)
+    async def test_drawing_file_not_found(self, tool: Callable, args: tuple) -> None:
         """Test drawing tools with non-existing file."""
-        mock_validate.side_effect = AsepriteCommandError("File not found")
+        self.mocks.runs = 0
+        self.mocks.validate.side_effect = AsepriteCommandError("File not found")
 
-        result = await draw_line("nonexistent.aseprite", 0, 0, 100, 100)
+        result = await tool("nonexistent.aseprite", *args)
         assert "File not found" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.drawing.AsepriteCommand.execute_lua_script")
-    async def test_drawing_command_error(
-        self, mock_execute: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    @pytest.mark.parametrize(("tool", "args"), DRAWING_CALLS)
+    async def test_drawing_command_error(self, tool: Callable, args: tuple) -> None:
         """Test drawing tools with command execution error."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_execute.side_effect = AsepriteCommandError("Command failed")
+        self.mocks.execute.side_effect = AsepriteCommandError("Command failed")
 
-        result = await draw_line("test.aseprite", 0, 0, 100, 100)
+        result = await tool("test.aseprite", *args)
         assert "Error executing Aseprite command" in result
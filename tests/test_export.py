@@ -2,156 +2,216 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, patch
+import os
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
 from aseprite_mcp.core.commands import AsepriteCommandError
-from aseprite_mcp.tools.export import export_animation, export_sprite, export_spritesheet
+from aseprite_mcp.tools import export
+from aseprite_mcp.tools.export import (
+    export_animation,
+    export_sprite,
+    export_sprite_multi,
+    export_spritesheet,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+# Valid arguments, after the filename, for a call of each export tool
+EXPORT_CALLS = [
+    (export_sprite, ("output.png",)),
+    (export_sprite_multi, ([{"output_filename": "output.png"}],)),
+    (export_animation, ("anim.gif",)),
+    (export_spritesheet, ("sheet.png",)),
+]
+
+
+@pytest.fixture(autouse=True)
+def downloads_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Export into a temporary directory instead of /app/downloads."""
+    monkeypatch.setenv("ASEPRITE_DOWNLOADS_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def clear_validation_cache():
+    """Make sure validation results don't leak between tests."""
+    export._validated_source.cache_clear()
+    yield
+    export._validated_source.cache_clear()
 
 
 class TestExportTools:
     """Test cases for export tools."""
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.run_command")
-    async def test_export_sprite_success(
-        self, mock_run: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    @pytest.fixture(autouse=True)
+    def mocks(self, aseprite_mocks: SimpleNamespace) -> SimpleNamespace:
+        """Patch Aseprite for every test; tests adjust the shared mocks."""
+        self.mocks = aseprite_mocks
+        return self.mocks
+
+    async def test_export_sprite_success(self) -> None:
         """Test successful sprite export."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_run.return_value = (True, "Export successful")
+        self.mocks.run.return_value = (True, "Export successful")
 
         result = await export_sprite("test.aseprite", "output.png", "png")
 
         assert "Sprite exported successfully" in result
         assert "PNG image" in result
-        mock_run.assert_called_once()
 
-    @pytest.mark.asyncio
     async def test_export_sprite_unsupported_format(self) -> None:
         """Test sprite export with unsupported format."""
+        self.mocks.runs = 0
         result = await export_sprite("test.aseprite", "output.xyz", "xyz")
         assert "Error: Unsupported format" in result
         assert "Supported formats:" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    async def test_export_sprite_file_not_found(self, mock_validate: AsyncMock) -> None:
-        """Test sprite export with non-existing file."""
-        mock_validate.side_effect = AsepriteCommandError("File not found")
+    @pytest.mark.parametrize(("tool", "args"), EXPORT_CALLS)
+    async def test_export_file_not_found(self, tool: Callable, args: tuple) -> None:
+        """Test export tools with non-existing file."""
+        self.mocks.runs = 0
+        self.mocks.validate.side_effect = AsepriteCommandError("File not found")
 
-        result = await export_sprite("nonexistent.aseprite", "output.png")
+        result = await tool("nonexistent.aseprite", *args)
         assert "File not found" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.run_command")
-    async def test_export_sprite_command_failure(
-        self, mock_run: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_export_sprite_command_failure(self) -> None:
         """Test sprite export with command failure."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_run.return_value = (False, "Export failed")
+        self.mocks.run.return_value = (False, "Export failed")
 
         result = await export_sprite("test.aseprite", "output.png")
 
         assert "Failed to export sprite" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.run_command")
-    async def test_export_animation_success(
-        self, mock_run: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_export_sprite_multi_success(self, downloads_dir: Path) -> None:
+        """Test exporting to several formats with one Aseprite run."""
+        self.mocks.run.return_value = (True, "Export successful")
+
+        result = await export_sprite_multi(
+            "test.aseprite",
+            [
+                {"output_filename": "output"},
+                {"output_filename": "output", "format": "GIF"},
+            ],
+        )
+
+        assert "Sprite exported successfully from test.aseprite to 2 files" in result
+        assert "Downloads/output.png (PNG image)" in result
+        assert "Downloads/output.gif (GIF animation)" in result
+        self.mocks.run.assert_called_once_with(
+            [
+                "--batch",
+                "/path/to/file.aseprite",
+                "--save-as",
+                os.path.join(downloads_dir, "output.png"),
+                "--save-as",
+                os.path.join(downloads_dir, "output.gif"),
+            ]
+        )
+
+    async def test_export_sprite_multi_invalid(self) -> None:
+        """Test export_sprite_multi output validation."""
+        self.mocks.runs = 0
+        result = await export_sprite_multi("test.aseprite", [])
+        assert "Error: No outputs provided" in result
+
+        result = await export_sprite_multi("test.aseprite", [{"format": "png"}])
+        assert "missing required key 'output_filename'" in result
+
+        result = await export_sprite_multi(
+            "test.aseprite", [{"output_filename": "a", "format": "xyz"}]
+        )
+        assert "Output 0 has unsupported format 'xyz'" in result
+
+    async def test_export_animation_success(self) -> None:
         """Test successful animation export."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_run.return_value = (True, "Animation exported")
+        self.mocks.run.return_value = (True, "Animation exported")
 
         result = await export_animation("test.aseprite", "anim.gif", "gif", 2)
 
         assert "Animation exported successfully" in result
         assert "scale: 2x" in result
-        mock_run.assert_called_once()
 
         # Check that scale was included in command
-        call_args = mock_run.call_args[0][0]
+        call_args = self.mocks.run.call_args[0][0]
         assert "--scale" in call_args
         assert "2" in call_args
 
-    @pytest.mark.asyncio
     async def test_export_animation_invalid_format(self) -> None:
         """Test animation export with invalid format."""
+        self.mocks.runs = 0
         result = await export_animation("test.aseprite", "anim.png", "png")
         assert "Error: Animation export only supports 'gif' and 'webp' formats" in result
 
-    @pytest.mark.asyncio
     async def test_export_animation_invalid_scale(self) -> None:
         """Test animation export with invalid scale."""
+        self.mocks.runs = 0
         result = await export_animation("test.aseprite", "anim.gif", "gif", 0)
         assert "Error: Scale must be between 1 and 10" in result
 
         result = await export_animation("test.aseprite", "anim.gif", "gif", 11)
         assert "Error: Scale must be between 1 and 10" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.run_command")
-    async def test_export_spritesheet_success(
-        self, mock_run: AsyncMock, mock_validate: AsyncMock
-    ) -> None:
+    async def test_export_spritesheet_success(self) -> None:
         """Test successful sprite sheet export."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_run.return_value = (True, "Sprite sheet exported")
+        self.mocks.run.return_value = (True, "Sprite sheet exported")
 
         result = await export_spritesheet("test.aseprite", "sheet.png", "png", "horizontal")
 
         assert "Sprite sheet exported successfully" in result
         assert "horizontal layout" in result
-        mock_run.assert_called_once()
+        call_args = self.mocks.run.call_args[0][0]
+        assert call_args[call_args.index("--sheet-type") + 1] == "horizontal"
 
-    @pytest.mark.asyncio
     async def test_export_spritesheet_invalid_format(self) -> None:
         """Test sprite sheet export with invalid format."""
+        self.mocks.runs = 0
         result = await export_spritesheet("test.aseprite", "sheet.gif", "gif")
         assert "Error: Sprite sheet export supports: png, jpg, jpeg, bmp, tga" in result
 
-    @pytest.mark.asyncio
     async def test_export_spritesheet_invalid_type(self) -> None:
         """Test sprite sheet export with invalid sheet type."""
+        self.mocks.runs = 0
         result = await export_spritesheet("test.aseprite", "sheet.png", "png", "invalid")
         assert "Error: Invalid sheet type" in result
         assert "Valid types:" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.run_command")
+    @pytest.mark.parametrize(("tool", "args"), EXPORT_CALLS)
     async def test_export_command_error_handling(
-        self, mock_run: AsyncMock, mock_validate: AsyncMock
+        self, tool: Callable, args: tuple
     ) -> None:
         """Test error handling for export operations."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_run.side_effect = AsepriteCommandError("Command failed")
+        self.mocks.run.side_effect = AsepriteCommandError("Command failed")
 
-        result = await export_sprite("test.aseprite", "output.png")
+        result = await tool("test.aseprite", *args)
 
         assert "Error executing Aseprite command" in result
         assert "Command failed" in result
 
-    @pytest.mark.asyncio
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.validate_file_exists")
-    @patch("aseprite_mcp.tools.export.AsepriteCommand.run_command")
     async def test_export_filename_extension_handling(
-        self, mock_run: AsyncMock, mock_validate: AsyncMock
+        self, downloads_dir: Path
     ) -> None:
         """Test that file extensions are handled correctly."""
-        mock_validate.return_value = "/path/to/file.aseprite"
-        mock_run.return_value = (True, "Export successful")
+        self.mocks.run.return_value = (True, "Export successful")
 
         # Test with filename without extension
         await export_sprite("test.aseprite", "output", "png")
 
         # Check that the command was called with .png extension
-        call_args = mock_run.call_args[0][0]
-        assert "output.png" in call_args
+        call_args = self.mocks.run.call_args[0][0]
+        assert os.path.join(downloads_dir, "output.png") in call_args
+
+    async def test_export_reuses_source_validation(self) -> None:
+        """Test that repeated exports of one sprite check the file once."""
+        self.mocks.runs = 3
+        self.mocks.run.return_value = (True, "Export successful")
+
+        await export_sprite("test.aseprite", "output.png", "png")
+        await export_sprite("test.aseprite", "output.bmp", "bmp")
+        await export_animation("test.aseprite", "anim.gif", "gif")
+
+        self.mocks.validate.assert_called_once_with("test.aseprite")
@@ -3,34 +3,70 @@
 from __future__ import annotations
 
 import os
-import tempfile
+import shutil
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+from uuid import uuid4
 
 import pytest
 
-from aseprite_mcp.tools.file_router import route_file, validate_output_directory
+from aseprite_mcp.tools import file_router
+from aseprite_mcp.tools.file_router import (
+    _fast_copy,
+    create_organized_structure,
+    list_recent_routes,
+    set_default_output_directory,
+    route_file,
+    validate_output_directory,
+)
+
+
+# These tests work on real files, so they are left out of `pytest -m "not slow"`
+pytestmark = [pytest.mark.anyio, pytest.mark.slow]
+
+
+@pytest.fixture(autouse=True)
+def clear_stat_cache():
+    """Make sure cached directory metadata doesn't leak between tests."""
+    file_router._invalidate_stat_cache()
+    yield
+    file_router._invalidate_stat_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_recent_routes():
+    """Start every test with an empty route history."""
+    file_router._recent_routes.clear()
+    yield
+    file_router._recent_routes.clear()
+
+
+@pytest.fixture(scope="module")
+def shared_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Directory shared by the tests of this module, created once."""
+    return tmp_path_factory.mktemp("file_router")
+
+
+@pytest.fixture(scope="module")
+def temp_source_file(shared_dir: Path) -> str:
+    """Source file shared by the tests of this module; tests only read it."""
+    source = shared_dir / "source" / "test.txt"
+    source.parent.mkdir()
+    source.write_text("Test content")
+    return str(source)
 
 
 class TestFileRouter:
     """Test core file routing functionality."""
 
     @pytest.fixture
-    def temp_source_file(self):
-        """Create a temporary source file for testing."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            f.write("Test content")
-            temp_file = f.name
-        yield temp_file
-        # Cleanup
-        if os.path.exists(temp_file):
-            os.unlink(temp_file)
+    def temp_dir(self, shared_dir: Path) -> str:
+        """Create a fresh directory for one test inside the shared directory."""
+        destination = shared_dir / uuid4().hex
+        destination.mkdir()
+        return str(destination)
 
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for testing."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            yield temp_dir
-
-    @pytest.mark.asyncio
     async def test_route_file_basic(self, temp_source_file, temp_dir):
         """Test basic file routing."""
         result = await route_file(
@@ -41,7 +77,6 @@ class TestFileRouter:
         
         assert "successfully" in result.lower()
 
-    @pytest.mark.asyncio
     async def test_route_file_nonexistent_source(self, temp_dir):
         """Test routing with nonexistent source file."""
         result = await route_file(
@@ -51,16 +86,295 @@ class TestFileRouter:
         
         assert "error" in result.lower()
 
-    @pytest.mark.asyncio
     async def test_validate_directory_valid(self, temp_dir):
         """Test directory validation with valid path."""
         result = await validate_output_directory(temp_dir)
         
         assert "valid" in result.lower() or "accessible" in result.lower()
 
-    @pytest.mark.asyncio
     async def test_validate_directory_invalid(self):
         """Test directory validation with invalid path."""
         result = await validate_output_directory("/nonexistent/path")
         
         assert "error" in result.lower() or "not found" in result.lower()
+
+    async def test_route_file_copies_contents_and_metadata(self, temp_dir):
+        """Test that the routed file matches the source, mtime included."""
+        source = os.path.join(temp_dir, "source.bin")
+        data = os.urandom(3 * 1024 * 1024 + 7)
+        with open(source, "wb") as f:
+            f.write(data)
+        os.utime(source, (1_000_000_000, 1_000_000_000))
+
+        dest_dir = os.path.join(temp_dir, "out")
+        result = await route_file(source_file=source, destination_directory=dest_dir)
+
+        assert "successfully" in result.lower()
+        dest = os.path.join(dest_dir, "source.bin")
+        with open(dest, "rb") as f:
+            assert f.read() == data
+        assert os.stat(dest).st_mtime == 1_000_000_000
+
+    def test_fast_copy_falls_back_to_buffered_copy(self, temp_source_file, temp_dir):
+        """Test the user-space copy when no kernel copy primitive is usable."""
+        dest = os.path.join(temp_dir, "copy.txt")
+        with patch("aseprite_mcp.tools.file_router._kernel_copy", return_value=False):
+            _fast_copy(temp_source_file, dest, os.open(dest, os.O_WRONLY | os.O_CREAT))
+
+        with open(dest) as f:
+            assert f.read() == "Test content"
+
+    @pytest.mark.parametrize(
+        "filename",
+        ["../escaped.txt", "nested/escaped.txt", "/tmp/escaped.txt", "", ".", ".."],
+    )
+    async def test_route_file_rejects_filename_with_directories(
+        self, temp_source_file, temp_dir, filename
+    ):
+        """Test that traversal and absolute filenames are refused."""
+        dest_dir = os.path.join(temp_dir, "out")
+        os.mkdir(dest_dir)
+
+        result = await route_file(
+            source_file=temp_source_file,
+            destination_directory=dest_dir,
+            filename=filename,
+        )
+
+        assert result.startswith("Error: Invalid filename")
+        assert os.listdir(temp_dir) == ["out"]
+        assert not os.listdir(dest_dir)
+        assert not os.path.exists("/tmp/escaped.txt")
+
+    async def test_route_file_source_is_directory(self, temp_dir):
+        """Test routing a directory instead of a file."""
+        result = await route_file(source_file=temp_dir, destination_directory=temp_dir)
+
+        assert "not a file" in result
+
+    async def test_route_file_existing_destination(self, temp_source_file, temp_dir):
+        """Test that an existing file is only replaced with overwrite=True."""
+        await route_file(source_file=temp_source_file, destination_directory=temp_dir)
+
+        result = await route_file(
+            source_file=temp_source_file, destination_directory=temp_dir
+        )
+        assert "already exists" in result
+
+        result = await route_file(
+            source_file=temp_source_file, destination_directory=temp_dir, overwrite=True
+        )
+        assert "Size: 12 bytes" in result
+        assert "Status: Overwritten" in result
+
+    async def test_route_file_onto_itself(self, temp_dir):
+        """Test that routing a file into its own directory leaves it intact."""
+        source = os.path.join(temp_dir, "a.txt")
+        with open(source, "w") as f:
+            f.write("Own content")
+
+        result = await route_file(
+            source_file=source, destination_directory=temp_dir, overwrite=True
+        )
+
+        assert result.startswith("Error: Source and destination are the same file")
+        with open(source) as f:
+            assert f.read() == "Own content"
+
+    async def test_route_file_overwrite_new_file(self, temp_source_file, temp_dir):
+        """Test that overwrite=True reports a file that didn't exist as created."""
+        result = await route_file(
+            source_file=temp_source_file, destination_directory=temp_dir, overwrite=True
+        )
+
+        assert "Status: Created" in result
+
+    async def test_route_file_outside_allowed_locations(
+        self, temp_source_file, temp_dir
+    ):
+        """Test that destinations outside the allowed locations are refused."""
+        with (
+            patch.object(file_router, "_SAFE_PREFIXES", ("/nowhere",)),
+            patch.object(file_router, "_cwd_grandparent", return_value=None),
+        ):
+            result = await route_file(
+                source_file=temp_source_file, destination_directory=temp_dir
+            )
+
+        assert "outside the allowed locations" in result
+        assert not os.listdir(temp_dir)
+
+    async def test_route_file_allowed_location_needs_separator(
+        self, temp_source_file, temp_dir
+    ):
+        """Test that a sibling sharing an allowed prefix isn't allowed."""
+        allowed = os.path.join(temp_dir, "out")
+        with (
+            patch.object(file_router, "_SAFE_PREFIXES", (allowed,)),
+            patch.object(file_router, "_cwd_grandparent", return_value=None),
+        ):
+            inside = await route_file(
+                source_file=temp_source_file,
+                destination_directory=os.path.join(allowed, "a"),
+            )
+            sibling = await route_file(
+                source_file=temp_source_file, destination_directory=allowed + "kit"
+            )
+
+        assert "successfully" in inside.lower()
+        assert "outside the allowed locations" in sibling
+        assert not os.path.exists(allowed + "kit")
+
+    async def test_validate_directory_reuses_recent_stat(self, temp_dir):
+        """Test that repeated validations share one stat and disk usage call."""
+        with (
+            patch.object(file_router.os, "stat", wraps=os.stat) as mock_stat,
+            patch.object(
+                file_router.shutil, "disk_usage", wraps=shutil.disk_usage
+            ) as mock_usage,
+        ):
+            await validate_output_directory(temp_dir)
+            await validate_output_directory(temp_dir)
+
+        assert mock_stat.call_count == 1
+        assert mock_usage.call_count == 1
+
+    async def test_validate_directory_sees_directory_created_by_route(
+        self, temp_source_file, temp_dir
+    ):
+        """Test that routing invalidates a cached missing directory."""
+        dest_dir = os.path.join(temp_dir, "new")
+        assert "Directory not found" in await validate_output_directory(dest_dir)
+
+        await route_file(source_file=temp_source_file, destination_directory=dest_dir)
+
+        result = await validate_output_directory(dest_dir)
+        assert "Directory validation: VALID" in result
+
+    async def test_create_organized_structure_by_type(self, temp_dir):
+        """Test that each directory of the layout is created exactly once."""
+        base = os.path.join(temp_dir, "output")
+        with patch.object(file_router.os, "mkdir", wraps=os.mkdir) as mock_mkdir:
+            result = await create_organized_structure(base, "by_type")
+
+        assert "Created by_type structure" in result
+        created = [str(call.args[0]) for call in mock_mkdir.call_args_list]
+        assert len(created) == len(set(created))
+        expected = ("images/png", "sprites/items", "exports/spritesheets", "projects")
+        for dir_path in expected:
+            assert os.path.isdir(os.path.join(base, dir_path))
+
+    async def test_create_organized_structure_twice(self, temp_dir):
+        """Test that an existing structure is left as it is."""
+        await create_organized_structure(temp_dir, "by_project")
+        result = await create_organized_structure(temp_dir, "by_project")
+
+        assert "Created by_project structure" in result
+
+    async def test_create_organized_structure_file_in_the_way(self, temp_dir):
+        """Test that a file where a directory belongs is reported."""
+        open(os.path.join(temp_dir, "exports"), "w").close()
+
+        result = await create_organized_structure(temp_dir, "by_project")
+
+        assert result.startswith("Error: Failed to create directory structure")
+
+    async def test_route_file_no_write_permission(self, temp_source_file, temp_dir):
+        """Test that a destination that can't be written is reported."""
+        with patch.object(file_router.os, "open", side_effect=PermissionError):
+            result = await route_file(
+                source_file=temp_source_file, destination_directory=temp_dir
+            )
+
+        assert "No write permission" in result
+
+    async def test_list_recent_routes(self, temp_source_file, temp_dir):
+        """Test that successful routes are listed newest first, up to the limit."""
+        assert await list_recent_routes() == "No files routed yet"
+
+        for name in ("first.txt", "second.txt", "third.txt"):
+            await route_file(
+                source_file=temp_source_file,
+                destination_directory=temp_dir,
+                filename=name,
+            )
+        await route_file(
+            source_file="/nonexistent/file.txt", destination_directory=temp_dir
+        )
+
+        result = await list_recent_routes(limit=2)
+
+        lines = result.splitlines()
+        assert lines[0] == "Recent routes (2 of 3):"
+        assert lines[1].endswith(f"{os.path.join(temp_dir, 'third.txt')} (12 bytes)")
+        assert lines[2].endswith(f"{os.path.join(temp_dir, 'second.txt')} (12 bytes)")
+
+    async def test_list_recent_routes_invalid_limit(self):
+        """Test that a non-positive limit is rejected."""
+        result = await list_recent_routes(limit=0)
+
+        assert result.startswith("Error:")
+
+    async def test_create_organized_structure_by_date(self, temp_dir):
+        """Test that the by_date layout is created for the current month."""
+        today = date.today()
+        month = os.path.join(str(today.year), f"{today.month:02d}")
+
+        result = await create_organized_structure(temp_dir, "by_date")
+
+        assert "Created by_date structure" in result
+        assert os.path.isdir(os.path.join(temp_dir, month, "exports"))
+        assert os.path.isdir(os.path.join(temp_dir, month, "sprites"))
+
+    async def test_create_organized_structure_invalid_type(self, temp_dir):
+        """Test that an unknown layout is rejected without creating anything."""
+        result = await create_organized_structure(temp_dir, "by_color")
+
+        assert result.startswith("Error: Invalid structure type")
+        assert not os.listdir(temp_dir)
+
+    async def test_validate_directory_space_thresholds(self, temp_dir):
+        """Test the error and warning thresholds for free disk space."""
+        with patch.object(file_router, "_free_bytes", return_value=150 << 20):
+            low = await validate_output_directory(temp_dir, min_space_mb=100)
+            file_router._invalidate_stat_cache()
+            insufficient = await validate_output_directory(temp_dir, min_space_mb=200)
+
+        assert "Directory validation: VALID" in low
+        assert "Warning: Low disk space: 150.0 MB available" in low
+        assert "Directory validation: INVALID" in insufficient
+        assert (
+            "Error: Insufficient disk space: 150.0 MB available, 200 MB required"
+            in insufficient
+        )
+
+    async def test_validate_directory_without_minimum_skips_space_check(self, temp_dir):
+        """Test that min_space_mb=0 doesn't query the free disk space."""
+        with patch("aseprite_mcp.tools.file_router._free_bytes") as mock_free:
+            result = await validate_output_directory(temp_dir, min_space_mb=0)
+
+        mock_free.assert_not_called()
+        assert "Directory validation: VALID" in result
+        assert "Available space" not in result
+
+    async def test_set_default_output_directory(self, temp_source_file, temp_dir):
+        """Test that route_file falls back to the default output directory."""
+        default_dir = os.path.join(temp_dir, "default")
+        with patch("aseprite_mcp.tools.file_router._default_output_directory", None):
+            result = await set_default_output_directory(default_dir)
+            expected = os.path.realpath(default_dir)
+            assert result == f"Default output directory set to: {expected}"
+
+            result = await route_file(source_file=temp_source_file)
+
+        assert "successfully" in result.lower()
+        assert os.path.isfile(os.path.join(default_dir, "test.txt"))
+
+    async def test_set_default_output_directory_invalid(self, temp_source_file):
+        """Test that a path that isn't a directory is refused as the default."""
+        with patch("aseprite_mcp.tools.file_router._default_output_directory", None):
+            result = await set_default_output_directory(temp_source_file)
+
+            assert result.startswith("Error: Cannot use")
+            assert "Error: Path exists but is not a directory" in result
+            assert file_router._default_output_directory is None
@@ -0,0 +1,62 @@
+"""Tests for the Aseprite file header reader."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+
+from aseprite_mcp.core.fileformat import SpriteHeader, count_layers, read_header
+
+
+class TestReadHeader:
+    """Test cases for read_header."""
+
+    def test_read_header(
+        self, tmp_path: Path, write_header: Callable[..., Path]
+    ) -> None:
+        """Test reading the sprite properties from a header."""
+        path = write_header(tmp_path / "test.aseprite", 64, 32, frames=3, depth=8)
+
+        assert read_header(path) == SpriteHeader(
+            width=64, height=32, frames=3, color_mode=2
+        )
+
+    def test_read_header_missing_file(self, tmp_path: Path) -> None:
+        """Test that a missing file yields no header."""
+        assert read_header(tmp_path / "missing.aseprite") is None
+
+    def test_read_header_not_aseprite(self, tmp_path: Path) -> None:
+        """Test that other files yield no header."""
+        path = tmp_path / "image.png"
+        path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 120)
+
+        assert read_header(path) is None
+
+    def test_read_header_truncated(self, tmp_path: Path) -> None:
+        """Test that a truncated file yields no header."""
+        path = tmp_path / "short.aseprite"
+        path.write_bytes(b"\0\0")
+
+        assert read_header(path) is None
+
+
+class TestCountLayers:
+    """Test cases for count_layers."""
+
+    def test_count_layers(
+        self, tmp_path: Path, write_header: Callable[..., Path]
+    ) -> None:
+        """Test that only top-level layers are counted."""
+        path = write_header(tmp_path / "test.aseprite", 16, 16, layers=[0, 0, 1, 1, 0])
+
+        assert count_layers(path) == 3
+
+    def test_count_layers_without_frame(
+        self, tmp_path: Path, write_header: Callable[..., Path]
+    ) -> None:
+        """Test that a file without frame data yields no count."""
+        path = tmp_path / "test.aseprite"
+        write_header(path, 16, 16)
+        path.write_bytes(path.read_bytes()[:128])
+
+        assert count_layers(path) is None